@@ -1,12 +1,15 @@
-from backend import game, board_reader, utils
+from backend import game, board_reader, journal, snapshot, tracing, utils
 from random import randrange
-from time import sleep
+from time import sleep, monotonic
 import sys
 import signal
 
 DEBUG = False
 KEYBOARD = False
 FORCE_MINIGAME = 0
+RESTORE = True
+JOURNAL = True
+TRACE = False
 
 # Run in debug mode if not on Raspberry Pi
 try:
@@ -20,6 +23,18 @@ except (ImportError):
 if "-d" in sys.argv:
     DEBUG = True
 
+# Start a new game instead of restoring the last snapshot
+if "-n" in sys.argv:
+    RESTORE = False
+
+# Don't record a journal of this session
+if "-j" in sys.argv:
+    JOURNAL = False
+
+# Attach latency traces to frames, see backend/tracing.py
+if "-t" in sys.argv:
+    TRACE = True
+
 # Force start a minigame at launch
 if "-m" in sys.argv:
     if "1" in sys.argv:
@@ -50,12 +65,29 @@ class App:
 
         self._state_lock: bool = False
 
+        # When the first input not yet handled by the game loop arrived, and the sensor scan that read it
+        self.tracer = tracing.Tracer(TRACE)
+        self._input_time: float | None = None
+        self._input_scan: tuple[float, float] | None = None
+
         #Initialise signal handling to end threads on exit
         signal.signal(signal.SIGINT, self.signal_handler)
 
         # initalise game
         self.game = game.SnakesAndLadders(10, 10, [], self.board, self.get_buttons_pressed, DEBUG)
 
+        # Restore the game in progress when the app last stopped
+        self.snapshots = snapshot.SnapshotWriter()
+        self._snapshot_key = None
+        data = snapshot.load_snapshot() if RESTORE and not FORCE_MINIGAME else None
+        if data is not None:
+            try:
+                self.game.restore(data)
+                print(f"Restored game at turn {self.game.current_turn}")
+            except ValueError as e:
+                print("Could not restore game snapshot:", e)
+                self.game = game.SnakesAndLadders(10, 10, [], self.board, self.get_buttons_pressed, DEBUG)
+
         if FORCE_MINIGAME:
             self.game = game.SnakesAndLadders(10, 10, [game.Player("Blue", 0)], self.board, self.get_buttons_pressed, DEBUG)
             self.game.players[0].position = self.game.ladders[0].bottom
@@ -63,6 +95,10 @@ class App:
             self.game.minigame = self.game.minigame_manager.new_minigame(self.game.get_current_player(), [], game.minigames.MINIGAMES[FORCE_MINIGAME - 1])
             self.game.state = game.SnakesLaddersGameState.MINIGAME
 
+        # Record every input so the session can be replayed offline
+        self.journal = journal.GameJournal(journal.session_path()) if JOURNAL else None
+        self.start_journal()
+
         if not DEBUG:
             # Start hardware listeners
             self.board.start_board_reader(self.on_board_change, False)
@@ -101,6 +137,7 @@ class App:
         self._state_lock = True 
         # Change values
         self.board_changed = True
+        self._mark_input(None if DEBUG else self.board.last_scan)
         # Unlock values
         self._state_lock = False
         
@@ -116,6 +153,7 @@ class App:
         self._state_lock = True 
         # Change values
         self.button_one_pressed = True
+        self._mark_input()
         # Unlock values
         self._state_lock = False
         
@@ -131,6 +169,7 @@ class App:
         self._state_lock = True 
         # Change values
         self.button_two_pressed = True
+        self._mark_input()
         # Unlock values
         self._state_lock = False
 
@@ -149,9 +188,20 @@ class App:
         self.board_changed = False
         self.button_one_pressed = False
         self.button_two_pressed = False
+        self._input_time = None
+        self._input_scan = None
         # Unlock values
         self._state_lock = False
 
+    def _mark_input(self, scan: tuple[float, float] = None):
+        """
+        Records when an input arrived, if it is the first not yet handled by the game loop.
+        Must be called while values are locked.
+        """
+        if self._input_time is None:
+            self._input_time = monotonic()
+            self._input_scan = scan
+
     def get_buttons_pressed(self) -> tuple[bool, bool]:
         """
         Returns which buttons have been pressed, then resets both button states.
@@ -191,8 +241,50 @@ class App:
             self.board.halt_reader()
             self.buttons.halt_reader()
         
+        self.snapshots.flush()
+        self.print_timings()
         sys.exit(0)
 
+    def print_timings(self):
+        """
+        Prints how long each update_game step and state transition has taken this game.
+        """
+        timings = self.game.get_timings()
+        for kind in ("steps", "transitions"):
+            print(f"{kind}:")
+            for name, t in timings[kind].items():
+                print(f"  {name}: {t['count']} runs, {t['total'] * 1000:.1f}ms total, "
+                      f"{t['mean'] * 1000:.3f}ms mean, {t['max'] * 1000:.3f}ms max")
+        if timings["unexpectedTransitions"]:
+            print("unexpected transitions:", timings["unexpectedTransitions"])
+
+    def start_journal(self):
+        """
+        Starts journaling self.game, which must be called whenever self.game is replaced.
+        """
+        if self.journal is not None:
+            self.journal.start(self.game)
+
+    def save_snapshot(self):
+        """
+        Saves a snapshot of the game at the start of each turn, so it can be restored if the app stops.
+        The snapshot is removed once the game is over or back in setup.
+        """
+        state = self.game.state
+        if state == game.SnakesLaddersGameState.GAMEPLAY:
+            key = (id(self.game), self.game.current_turn, len(self.game.players))
+        elif state in (game.SnakesLaddersGameState.SETUP, game.SnakesLaddersGameState.GAME_OVER):
+            key = state
+        else:
+            return
+        if key == self._snapshot_key:
+            return
+        self._snapshot_key = key
+        if state == game.SnakesLaddersGameState.GAMEPLAY:
+            self.snapshots.save(self.game.snapshot())
+        else:
+            self.snapshots.clear()
+
     def run(self):
         """
         Sends the inital state of the game then enters gameplay loop.
@@ -244,10 +336,12 @@ class App:
                 if "reset" == user_input:
                     ### Type "reset", and then press enter after so frontend knows to update to a clear state again
                     self.game = game.SnakesAndLadders(10, 10, [], self.board, self.get_buttons_pressed, DEBUG)
+                    self.start_journal()
 
                 elif "load" == user_input:
                     game_players = [game.Player(name, direction) for (name, direction) in [("Blue", 0), ("Yellow", 90), ("Green", 180), ("Pink", 270)]]
                     self.game = game.SnakesAndLadders(10, 10, game_players, self.board, self.get_buttons_pressed, DEBUG)
+                    self.start_journal()
 
                 elif 'f' in user_input:
                     current_board = state_from_file(in_file)
@@ -262,17 +356,28 @@ class App:
 
             print("In state:", current_board)
 
+            # Time each stage of handling the input, from when it arrived
+            trace = self.tracer.begin(self._input_time, self._input_scan)
+
             # Send hardware to backend logic
-            self.game.update_game(current_board, self.button_one_pressed, self.button_two_pressed)
+            btn1, btn2 = self.button_one_pressed, self.button_two_pressed
+            with trace.stage("update_game"):
+                self.game.update_game(current_board, btn1, btn2)
+            if self.journal is not None:
+                self.journal.record_input(current_board, btn1, btn2, self.game)
 
             # Reset board_changed, btn1, and btn2
             self.reset_on_changes()
 
+            # Save the game at turn boundaries for crash recovery
+            self.save_snapshot()
+
             # Store game piece positions for debugging
             state_to_file(out_file, self.game.get_player_positions())
 
             # Retrieve game data
-            data = self.game.get_json()
+            with trace.stage("get_json"):
+                data = self.game.get_json()
 
             if DEBUG:
                 # Store most recent game data, replacing last game_data file
@@ -280,7 +385,7 @@ class App:
                     file.write(data)
 
             # Send game state to server to distribute to clients
-            utils.send_json(data)
+            utils.send_json(trace.attach(data))
     
 def state_from_file(file_name: str) -> list[tuple[int,int]]:
     """
@@ -1 +1 @@
-__all__ = ["board_reader", "game", "substitute_gpio_lib", "game_components", "utils"]
+__all__ = ["board_reader", "game", "substitute_gpio_lib", "game_components", "utils", "board_geometry"]
@@ -0,0 +1,202 @@
+"""
+Exact analysis of how long a Snakes and Ladders layout takes to finish.
+
+A single player's progress through a game is a Markov chain over (swapped, tile) states, where
+swapped is 1 after an odd number of Swap Snakes and Ladders cards. Transition probabilities
+come from the dice, CardManager's weights and the minigame win probability, following the rules
+of SnakesAndLadders and the cards in game_components. Expected turns, their variance and the
+probability of finishing by each turn are then solved with sparse linear algebra instead of sampled.
+
+Only one player is modelled. Cards that depend on other players (Swap with Leader, Helping Hand)
+have no effect, as in a one player game, and no player is ever bumped off an occupied tile.
+Use simulation for games with more players.
+
+Analysing one layout takes a few milliseconds, so it can be used inside layout search loops.
+
+Usage:
+    analysis = analyze(SNAKES[:7], LADDERS[:7])
+    print(analysis.expected_turns, analysis.variance, analysis.finish_cdf(100)[-1])
+
+    # The layout of a game in progress
+    analysis = analyze([(s.head, s.tail) for s in game.snakes], [(l.bottom, l.top) for l in game.ladders])
+"""
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+
+from .board_geometry import BoardGeometry, get_geometry
+from .game_components import *
+
+class LayoutAnalysis:
+    """
+    Exact statistics for a single player playing a layout from the start position.
+        expected_turns: mean number of turns taken to reach the last square.
+        variance: variance of the number of turns.
+        remaining_turns: expected turns left from each state, indexed by [swapped, tile].
+    """
+
+    def __init__(self, transitions: sparse.csr_matrix, first_turn: np.ndarray, n_tiles: int) -> None:
+        self._transitions = transitions
+        self._first_turn = first_turn
+
+        # Expected turns t left from each state solve (I - Q)t = 1, and
+        # the expected squares of turns left m solve (I - Q)m = 2t - 1
+        identity = sparse.identity(transitions.shape[0], format="csc")
+        system = (identity - transitions).tocsc()
+        remaining = spsolve(system, np.ones(transitions.shape[0]))
+        second_moments = spsolve(system, 2 * remaining - 1)
+
+        # The first turn is always a dice roll, then the chain is followed from wherever it lands
+        self.expected_turns = float(1 + first_turn @ remaining)
+        self.variance = float(first_turn @ second_moments - (first_turn @ remaining) ** 2)
+        self.remaining_turns = remaining.reshape(2, n_tiles)
+
+    def finish_cdf(self, max_turns: int) -> np.ndarray:
+        """
+        Returns an array of length max_turns, where element k - 1 is the probability of
+        having reached the last square within k turns.
+        """
+        cdf = np.zeros(max_turns)
+        transposed = self._transitions.T.tocsr()
+        on_board = self._first_turn
+        for k in range(max_turns):
+            cdf[k] = 1 - on_board.sum()
+            on_board = transposed @ on_board
+        return cdf
+
+class _Layout:
+    """
+    Where each tile leads to in one arrangement of snakes and ladders, for a single player.
+    """
+
+    def __init__(self, geometry: BoardGeometry, snakes: list[tuple[int, int]], ladders: list[tuple[int, int]]) -> None:
+        self.n_tiles = geometry.n_tiles
+        # Tile -> (tile it leads to, True if a snake). As in SnakesAndLadders, a snake takes
+        # priority over a ladder on the same tile, and the first entity in a list over later ones
+        self.entities: dict[int, tuple[int, bool]] = {}
+        for head, tail in snakes:
+            self.entities.setdefault(head, (tail, True))
+        for bottom, top in ladders:
+            self.entities.setdefault(bottom, (top, False))
+        self.snake_heads = sorted(set(head for head, _ in snakes))
+        self._snake_tails = {}
+        for head, tail in snakes:
+            self._snake_tails.setdefault(head, tail)
+
+    def settle(self, tile: int) -> int:
+        """
+        Returns the tile a player on tile ends up on after following any snakes and ladders.
+        Raises ValueError if snakes and ladders lead into each other in a loop.
+        """
+        seen = set()
+        while tile < self.n_tiles and tile in self.entities:
+            if tile in seen:
+                raise ValueError(f"Snakes and ladders lead into each other in a loop at tile {tile}")
+            seen.add(tile)
+            tile = self.entities[tile][0]
+        return tile
+
+    def next_snake_tail(self, tile: int) -> int | None:
+        """
+        Returns the tail of the nearest snake whose head is after tile, or None if there isn't one.
+        """
+        for head in self.snake_heads:
+            if head > tile:
+                return self._snake_tails[head]
+        return None
+
+def _roll_outcomes(layout: _Layout, tile: int, minigame_win_prob: float) -> list[tuple[int, float]]:
+    """
+    Returns (tile, probability) pairs for a dice roll from tile, including any minigame played.
+    """
+    outcomes = []
+    for roll in range(1, 7):
+        landed = tile + roll
+        entity = layout.entities.get(landed) if landed < layout.n_tiles else None
+        if entity is None:
+            outcomes.append((landed, 1 / 6))
+            continue
+        # Win a minigame to climb a ladder, lose one to slide down a snake
+        dest, is_snake = entity
+        moves_prob = (1 - minigame_win_prob) if is_snake else minigame_win_prob
+        outcomes.append((layout.settle(dest), moves_prob / 6))
+        outcomes.append((landed, (1 - moves_prob) / 6))
+    return outcomes
+
+def analyze(snakes: list[tuple[tuple[int, int], tuple[int, int]]],
+            ladders: list[tuple[tuple[int, int], tuple[int, int]]],
+            weights: list[float] = None,
+            minigame_win_prob: float = 0.5,
+            n_rows: int = 10,
+            n_cols: int = 10) -> LayoutAnalysis:
+    """
+    Analyses one layout, given as lists of snake (head, tail) and ladder (bottom, top) (r,c) positions
+    in the order SnakesAndLadders stores them. Snake i is paired with ladder i when they are swapped.
+    Cards are drawn from CardManager's deck using weights, or CardManager's weights if None.
+    """
+    geometry = get_geometry(n_rows, n_cols)
+    n_tiles = geometry.n_tiles
+    deck = CardManager().deck
+    if weights is None:
+        weights = CardManager().weights
+    # Probability of each effect primitive, see game_components.EFFECTS. all_forward is kept per number of spaces
+    roll_prob = descend_prob = swap_prob = stay_prob = 0.0
+    forward_probs: dict[int, float] = {}
+    for card, prob in zip(deck, np.array(weights, dtype=float) / sum(weights)):
+        definition = CARD_TABLE.by_type[card]
+        if definition.effect == "roll_dice":
+            roll_prob += prob
+        elif definition.effect == "descend_snake":
+            descend_prob += prob
+        elif definition.effect == "all_forward":
+            spaces = definition.params["spaces"]
+            forward_probs[spaces] = forward_probs.get(spaces, 0.0) + prob
+        elif definition.effect == "swap_snakes_and_ladders":
+            swap_prob += prob
+        else:
+            # Cards with no effect for a single player
+            stay_prob += prob
+
+    snake_tiles = [(geometry.tile(head), geometry.tile(tail)) for head, tail in snakes]
+    ladder_tiles = [(geometry.tile(bottom), geometry.tile(top)) for bottom, top in ladders]
+    # See SwapSnakesAndLaddersCard. Snake i runs from ladder i's top to its bottom, and ladder i from snake i's tail to its head
+    pairs = min(len(snakes), len(ladders))
+    swapped_snakes = [(top, bottom) for bottom, top in ladder_tiles[:pairs]] + snake_tiles[pairs:]
+    swapped_ladders = [(tail, head) for head, tail in snake_tiles[:pairs]] + ladder_tiles[pairs:]
+    layouts = [_Layout(geometry, snake_tiles, ladder_tiles), _Layout(geometry, swapped_snakes, swapped_ladders)]
+
+    rows, cols, probs = [], [], []
+    def add(swapped: int, tile: int, to_swapped: int, to_tile: int, prob: float) -> None:
+        # Reaching the last square leaves the chain, so isn't stored
+        if prob > 0 and to_tile < n_tiles:
+            rows.append(swapped * n_tiles + tile)
+            cols.append(to_swapped * n_tiles + to_tile)
+            probs.append(prob)
+
+    for swapped, layout in enumerate(layouts):
+        other = layouts[1 - swapped]
+        for tile in range(n_tiles):
+            for to_tile, prob in _roll_outcomes(layout, tile, minigame_win_prob):
+                add(swapped, tile, swapped, to_tile, prob * roll_prob)
+
+            tail = layout.next_snake_tail(tile)
+            add(swapped, tile, swapped, tile if tail is None else layout.settle(tail), descend_prob)
+
+            for spaces, prob in forward_probs.items():
+                add(swapped, tile, swapped, layout.settle(tile + spaces), prob)
+
+            # Anyone on a snake or ladder after swapping moves forward one tile
+            to_tile = other.settle(tile + 1) if tile in other.entities else tile
+            add(swapped, tile, 1 - swapped, to_tile, swap_prob)
+
+            add(swapped, tile, swapped, tile, stay_prob)
+
+    transitions = sparse.csr_matrix((probs, (rows, cols)), shape=(2 * n_tiles, 2 * n_tiles))
+
+    # Every player's first turn is a dice roll from off the board, which acts as tile 0
+    first_turn = np.zeros(2 * n_tiles)
+    for to_tile, prob in _roll_outcomes(layouts[0], 0, minigame_win_prob):
+        if to_tile < n_tiles:
+            first_turn[to_tile] += prob
+
+    return LayoutAnalysis(transitions, first_turn, n_tiles)
@@ -0,0 +1,117 @@
+"""
+Tile numbering for boards that wind back and forth from the bottom to the top, as in Snakes and Ladders.
+
+Tile 1 is the bottom left square, (n_rows - 1, 0). The bottom row runs left to right, the row
+above it right to left, and so on up the board. e.g. on a 10x10 board:
+    (9, 0) -> 1, (9, 9) -> 10, (8, 9) -> 11, (8, 0) -> 20, ..., (0, 0) -> 100
+
+Tile 0 is the start position just off the board, (n_rows - 1, -1). Tiles past the last square
+continue the winding pattern above the board into negative rows, which is how a move past the
+finish is represented.
+"""
+from functools import lru_cache
+
+class BoardGeometry:
+    """
+    Precomputed tile <-> (r,c) position tables for one board size.
+    Use get_geometry rather than creating these directly so tables are only built once per size.
+    """
+
+    def __init__(self, n_rows: int, n_cols: int) -> None:
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        self.n_tiles = n_rows * n_cols
+
+        # Tables cover the start tile, every square, and one row past the finish
+        self.tile_to_position: list[tuple[int, int]] = [self._position(t) for t in range(self.n_tiles + n_cols + 1)]
+        self.position_to_tile: dict[tuple[int, int], int] = {pos: t for t, pos in enumerate(self.tile_to_position)}
+        # Tile number of each square on the board, accessed as tile_grid[r][c]
+        self.tile_grid: list[list[int]] = [[self.position_to_tile[(r, c)] for c in range(n_cols)] for r in range(n_rows)]
+        # Bit representing each square in a board mask. Square (r,c) is bit r * n_cols + c
+        self.square_bits: dict[tuple[int, int], int] = {(r, c): 1 << (r * n_cols + c) for r in range(n_rows) for c in range(n_cols)}
+
+    def _position(self, tile: int) -> tuple[int, int]:
+        """
+        Calculates the (r,c) position of tile.
+        """
+        if tile == 0:
+            return (self.n_rows - 1, -1)
+        row_from_bottom, i = divmod(tile - 1, self.n_cols)
+        c = i if row_from_bottom % 2 == 0 else self.n_cols - 1 - i
+        return (self.n_rows - 1 - row_from_bottom, c)
+
+    def _tile(self, pos: tuple[int, int]) -> int:
+        """
+        Calculates the tile number of the (r,c) position pos.
+        """
+        (r, c) = pos
+        row_from_bottom = self.n_rows - 1 - r
+        i = c if row_from_bottom % 2 == 0 else self.n_cols - 1 - c
+        return row_from_bottom * self.n_cols + i + 1
+
+    def position(self, tile: int) -> tuple[int, int]:
+        """
+        Returns the (r,c) position of tile.
+        """
+        if 0 <= tile < len(self.tile_to_position):
+            return self.tile_to_position[tile]
+        return self._position(tile)
+
+    def tile(self, pos: tuple[int, int]) -> int:
+        """
+        Returns the tile number of the (r,c) position pos.
+        """
+        tile = self.position_to_tile.get(pos)
+        if tile is None:
+            return self._tile(pos)
+        return tile
+
+    def path(self, start: int, end: int) -> list[tuple[int, int]]:
+        """
+        Returns the positions of tiles start up to, but not including, end.
+        """
+        if end <= len(self.tile_to_position):
+            return self.tile_to_position[start:end]
+        return [self.position(t) for t in range(start, end)]
+
+    def mask(self, positions: list[tuple[int, int]]) -> int | None:
+        """
+        Returns a bitmask with the bit of each position set, or None if any position is not on the board.
+        """
+        mask = 0
+        for pos in positions:
+            bit = self.square_bits.get(pos)
+            if bit is None:
+                return None
+            mask |= bit
+        return mask
+
+    def mask_positions(self, mask: int) -> list[tuple[int, int]]:
+        """
+        Returns the (r,c) positions of the bits set in mask, in row then column order.
+        """
+        positions = []
+        while mask:
+            lowest = mask & -mask
+            positions.append(divmod(lowest.bit_length() - 1, self.n_cols))
+            mask ^= lowest
+        return positions
+
+    def is_finished(self, tile: int) -> bool:
+        """
+        Returns True if tile is on or past the last square of the board.
+        """
+        return tile >= self.n_tiles
+
+    def squares(self) -> dict[tuple[int, int], int]:
+        """
+        Returns a dict from the (r,c) position of every square on the board to its tile number.
+        """
+        return {pos: t for pos, t in self.position_to_tile.items() if 1 <= t <= self.n_tiles}
+
+@lru_cache(maxsize=None)
+def get_geometry(n_rows: int, n_cols: int) -> BoardGeometry:
+    """
+    Returns the BoardGeometry for a board of n_rows by n_cols, building it on first use.
+    """
+    return BoardGeometry(n_rows, n_cols)
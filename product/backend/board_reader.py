@@ -70,6 +70,8 @@ class BoardReader():
         self._reader_active_lock = False
         self._halt_thread_loop = False
         self._halt_on_first = False
+        # time.monotonic() at the start and end of the last sensor scan, for latency tracing
+        self.last_scan: tuple[float, float] = (0.0, 0.0)
 
     def read_positions(self, trigger_on_change: bool=True) -> list[tuple[int, int]]:
         """
@@ -127,6 +129,7 @@ class BoardReader():
         flag.
         """
 
+        scan_start = time.monotonic()
         board = [[0 for _ in range(10)] for _ in range(10)]
         positions = []
 
@@ -154,6 +157,7 @@ class BoardReader():
 
         self._board = board[:]
         self._positions = positions[:]
+        self.last_scan = (scan_start, time.monotonic())
         #self._reader_active_lock = False
 
     def get_board(self) -> list[list[int]]:
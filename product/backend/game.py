@@ -1,17 +1,22 @@
 from __future__ import annotations
 from enum import Enum
+from bisect import bisect_left, bisect_right, insort
+from itertools import groupby
+from operator import itemgetter
 import random
 import json
-from typing import List, Dict
+import os
+import struct
+from time import perf_counter
+from typing import List, Dict, Callable
 
 from backend.game_components import * 
+from .board_geometry import BoardGeometry, get_geometry
+from .moves import Move, MoveTable
 from . import minigames
 from . import utils
 
 
-# A dict from Position -> Number, used for snakes and ladders code sometimes.
-POSITION_TO_NUM = {(0, 0): 100, (0, 1): 99, (0, 2): 98, (0, 3): 97, (0, 4): 96, (0, 5): 95, (0, 6): 94, (0, 7): 93, (0, 8): 92, (0, 9): 91, (1, 9): 90, (1, 8): 89, (1, 7): 88, (1, 6): 87, (1, 5): 86, (1, 4): 85, (1, 3): 84, (1, 2): 83, (1, 1): 82, (1, 0): 81, (2, 0): 80, (2, 1): 79, (2, 2): 78, (2, 3): 77, (2, 4): 76, (2, 5): 75, (2, 6): 74, (2, 7): 73, (2, 8): 72, (2, 9): 71, (3, 9): 70, (3, 8): 69, (3, 7): 68, (3, 6): 67, (3, 5): 66, (3, 4): 65, (3, 3): 64, (3, 2): 63, (3, 1): 62, (3, 0): 61, (4, 0): 60, (4, 1): 59, (4, 2): 58, (4, 3): 57, (4, 4): 56, (4, 5): 55, (4, 6): 54, (4, 7): 53, (4, 8): 52, (4, 9): 51, (5, 9): 50, (5, 8): 49, (5, 7): 48, (5, 6): 47, (5, 5): 46, (5, 4): 45, (5, 3): 44, (5, 2): 43, (5, 1): 42, (5, 0): 41, (6, 0): 40, (6, 1): 39, (6, 2): 38, (6, 3): 37, (6, 4): 36, (6, 5): 35, (6, 6): 34, (6, 7): 33, (6, 8): 32, (6, 9): 31, (7, 9): 30, (7, 8): 29, (7, 7): 28, (7, 6): 27, (7, 5): 26, (7, 4): 25, (7, 3): 24, (7, 2): 23, (7, 1): 22, (7, 0): 21, (8, 0): 20, (8, 1): 19, (8, 2): 18, (8, 3): 17, (8, 4): 16, (8, 5): 15, (8, 6): 14, (8, 7): 13, (8, 8): 12, (8, 9): 11, (9, 9): 10, (9, 8): 9, (9, 7): 8, (9, 6): 7, (9, 5): 6, (9, 4): 5, (9, 3): 4, (9, 2): 3, (9, 1): 2, (9, 0): 1}
-
 # List of possible snake (head,tail) positions in (r,c) format.
 SNAKES = [
     ((0,1),(4,1)),
@@ -41,6 +46,45 @@ LADDERS = [
     ((8,6),(7,9))
 ]
 
+# Precomputed layouts chosen by backend.layouts, as a JSON list of {"snakes": [...], "ladders": [...]}
+LAYOUT_POOL_PATH = os.path.join(os.path.dirname(__file__), "layout_pool.json")
+
+def load_layout_pool(path: str = LAYOUT_POOL_PATH) -> list[tuple[list, list]]:
+    """
+    Returns the (snakes, ladders) layouts saved at path, in (r,c) format.
+    Returns an empty list if there is no layout pool.
+    """
+    try:
+        with open(path) as f:
+            pool = json.load(f)
+    except (OSError, ValueError):
+        return []
+    to_entities = lambda entities: [(tuple(a), tuple(b)) for a, b in entities]
+    return [(to_entities(layout["snakes"]), to_entities(layout["ladders"])) for layout in pool]
+
+LAYOUT_POOL = load_layout_pool()
+
+# Number of cards in the shuffled deck cards are dealt from, or None to draw every card independently.
+# See CardManager
+DECK_SIZE = None
+
+# Binary snapshot format, see SnakesAndLadders.snapshot. All values are little endian
+SNAPSHOT_MAGIC = b"SnL"
+SNAPSHOT_VERSION = 2
+# magic, version, n_rows, n_cols, state, current_turn, current_card_id, current card's deck index,
+# duel first and second roll, minigame trigger kind and index, number of players, snakes and ladders
+_SNAPSHOT_HEADER = struct.Struct("<3sBBBBHBbBBBBBBB")
+# direction, position, number of intermediate positions
+_SNAPSHOT_PLAYER = struct.Struct("<HbbH")
+# Player format of each version that can still be restored. Version 1 stored the count as a signed byte
+_SNAPSHOT_PLAYERS = {1: struct.Struct("<Hbbb"), SNAPSHOT_VERSION: _SNAPSHOT_PLAYER}
+_SNAPSHOT_POSITION = struct.Struct("<bb")
+_SNAPSHOT_ENTITY = struct.Struct("<bbbb")
+# Stored in place of a position of None, which is never a real position
+_NO_POSITION = (-128, -128)
+# Minigame trigger kinds
+_NO_TRIGGER, _SNAKE_TRIGGER, _LADDER_TRIGGER = 0, 1, 2
+
 # SnL Game States to identify which actions to take in update_game
 class SnakesLaddersGameState(Enum):
     SETUP = 0
@@ -60,6 +104,53 @@ GAMEPHASES = [
     'gameover'
     ]
 
+# States update_game can move the game to from each state. Other transitions, e.g. from debugging
+# tools forcing a state, still happen but are counted in SnakesAndLadders.unexpected_transitions
+TRANSITIONS: Dict[SnakesLaddersGameState, set[SnakesLaddersGameState]] = {
+    SnakesLaddersGameState.SETUP: {SnakesLaddersGameState.GAMEPLAY},
+    SnakesLaddersGameState.GAMEPLAY: {SnakesLaddersGameState.DRAWCARD, SnakesLaddersGameState.INCORRECT_SQUARE,
+                                      SnakesLaddersGameState.GAME_OVER},
+    SnakesLaddersGameState.DRAWCARD: {SnakesLaddersGameState.GAMEPLAY, SnakesLaddersGameState.INCORRECT_SQUARE,
+                                      SnakesLaddersGameState.MINIGAME, SnakesLaddersGameState.GAME_OVER},
+    SnakesLaddersGameState.INCORRECT_SQUARE: {SnakesLaddersGameState.GAMEPLAY, SnakesLaddersGameState.DRAWCARD,
+                                              SnakesLaddersGameState.MINIGAME, SnakesLaddersGameState.GAME_OVER},
+    SnakesLaddersGameState.MINIGAME: {SnakesLaddersGameState.DRAWCARD, SnakesLaddersGameState.GAME_OVER},
+    SnakesLaddersGameState.GAME_OVER: {SnakesLaddersGameState.SETUP}
+}
+
+# The steps of one update_game pass, in order, as (name, state, handler method).
+# A step runs if the game is in its state when the step's turn comes, or always if state is None,
+# so one input can move the game through several states. The pass ends once a handler returns True.
+UPDATE_STEPS = [
+    ("gameover", SnakesLaddersGameState.GAME_OVER, "_step_game_over"),
+    ("check-gameover", None, "_step_check_game_over"),
+    ("setup", SnakesLaddersGameState.SETUP, "_step_setup"),
+    ("gameplay", SnakesLaddersGameState.GAMEPLAY, "_step_gameplay"),
+    ("drawcard", SnakesLaddersGameState.DRAWCARD, "_step_drawcard"),
+    ("incorrect-square", SnakesLaddersGameState.INCORRECT_SQUARE, "_step_incorrect_square"),
+    ("minigame", None, "_step_minigame")
+]
+
+class Timing:
+    """
+    How many times something ran, and the total and longest time it took in seconds.
+    """
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def as_dict(self) -> Dict:
+        return {"count": self.count, "total": self.total, "mean": self.total / self.count if self.count else 0.0, "max": self.max}
+
 # Positions used during 'setup' gamestate to assign player colours and directions.
 # Elements are given in clockwise order, starting from direction 0.
 SETUP_POSITIONS = [
@@ -86,13 +177,32 @@ SETUP_COLOURS = [
 class Player:
     """
     Object representing player. Stores the position, intermediate positions, and direction.
+    The game the player belongs to is notified whenever position is set, so it can keep its
+    occupancy and standings up to date.
     """
+    __slots__ = ("name", "_on_move", "_position", "intermediate_positions", "direction")
+
     def __init__(self, colour: str, direction: int = 0, position: tuple[int,int] = None) -> None:
         self.name = colour
-        self.position = position
+        self._on_move: Callable[[Player, tuple[int,int] | None, tuple[int,int] | None], None] | None = None
+        self._position = position
         self.intermediate_positions = []
         self.direction = direction  # Direction is an angle 0-360
 
+    @property
+    def position(self) -> tuple[int,int] | None:
+        """
+        The player's (r,c) position, or None if the player is not on the board.
+        """
+        return self._position
+
+    @position.setter
+    def position(self, position: tuple[int,int] | None) -> None:
+        old = self._position
+        self._position = position
+        if self._on_move is not None and old != position:
+            self._on_move(self, old, position)
+
 # Base Game Class
 class Game:
     """
@@ -102,11 +212,112 @@ class Game:
     def __init__(self, n_rows: int, n_cols: int, players: List[Player] = []) -> None:
         self.n_rows: int = n_rows
         self.n_cols: int = n_cols
-        self.players: list[Player] = players
+        self.geometry: BoardGeometry = get_geometry(n_rows, n_cols)
+        self._players: list[Player] = []
+        self.players = players
         self.current_turn: int = 0
         #self.button_one_pressed: bool = False
         #self.button_two_pressed: bool = False
 
+    @property
+    def players(self) -> list[Player]:
+        """
+        The players in turn order. Use add_player to add a player to the game,
+        or assign a new list to replace all players.
+        """
+        return self._players
+
+    @players.setter
+    def players(self, players: List[Player]) -> None:
+        for p in self._players:
+            p._on_move = None
+        self._players = []
+        # Number of players on each (r,c) position
+        self._occupancy: Dict[tuple[int,int], int] = {}
+        # (tile, join order) of every player with a position, sorted from last place to first
+        self._standings: list[tuple[int, int]] = []
+        # Join order -> Player
+        self._joined: Dict[int, Player] = {}
+        self._join_order: Dict[Player, int] = {}
+        # Bitmask of the squares the players are expected to be on, see BoardGeometry.mask
+        self._expected_mask: int = 0
+        # Number of squares set in _expected_mask, and number of players with a position
+        self._expected_squares: int = 0
+        self._positioned: int = 0
+        for p in players:
+            self.add_player(p)
+
+    def add_player(self, player: Player) -> None:
+        """
+        Adds player to the end of the turn order.
+        """
+        order = len(self._joined)
+        self._players.append(player)
+        self._joined[order] = player
+        self._join_order[player] = order
+        player._on_move = self._on_player_moved
+        self._on_player_moved(player, None, player.position)
+
+    def _on_player_moved(self, player: Player, old: tuple[int,int] | None, new: tuple[int,int] | None) -> None:
+        """
+        Updates occupancy and standings when player moves from old to new.
+        """
+        order = self._join_order[player]
+        if old is not None:
+            self._occupancy[old] -= 1
+            self._positioned -= 1
+            if self._occupancy[old] == 0:
+                del self._occupancy[old]
+                if old in self.geometry.square_bits:
+                    self._expected_mask ^= self.geometry.square_bits[old]
+                    self._expected_squares -= 1
+            del self._standings[bisect_left(self._standings, (self.geometry.tile(old), order))]
+        if new is not None:
+            self._occupancy[new] = self._occupancy.get(new, 0) + 1
+            self._positioned += 1
+            if self._occupancy[new] == 1 and new in self.geometry.square_bits:
+                self._expected_mask |= self.geometry.square_bits[new]
+                self._expected_squares += 1
+            insort(self._standings, (self.geometry.tile(new), order))
+
+    def is_occupied(self, pos: tuple[int,int], player: Player = None) -> bool:
+        """
+        Returns True if any player, other than player if given, is at pos.
+        """
+        count = self._occupancy.get(pos, 0)
+        if player is not None and player.position == pos:
+            count -= 1
+        return count > 0
+
+    def get_standings(self) -> list[Player]:
+        """
+        Returns the players with a position on the board, from first place to last.
+        Players sharing a tile are listed in the order they joined, as a stable sort of the players would.
+        """
+        standings = []
+        for _, sharing in groupby(reversed(self._standings), key=itemgetter(0)):
+            standings.extend(self._joined[order] for _, order in reversed(list(sharing)))
+        return standings
+
+    def get_last_place(self) -> Player | None:
+        """
+        Returns the player furthest from the finish, or None if no players are on the board.
+        If several players share the last tile, the one who joined first is returned.
+        """
+        if not self._standings:
+            return None
+        return self._joined[self._standings[0][1]]
+
+    def get_next_ahead(self, tile: int) -> Player | None:
+        """
+        Returns the closest player on a tile after tile, or None if no players are ahead.
+        If several players share that tile, the one who joined first is returned.
+        """
+        i = bisect_right(self._standings, (tile, len(self._joined)))
+        if i == len(self._standings):
+            return None
+        return self._joined[self._standings[i][1]]
+
     def get_current_player(self) -> Player | None:
         """
         Gets the player whose turn it currently is.
@@ -131,15 +342,30 @@ class Game:
             print(f"Player {player.name} is at position {player.position}")
 
 # Entities
-class Snake():
+class Entity():
+    """
+    Base class of the immutable Snake and Ladder records.
+    Entities never change once made, so a layout change replaces them instead. See SwapSnakesAndLaddersCard.
+    """
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+class Snake(Entity):
     """
     Snake class for SnakesAndLadders Game.
     Stores the head (r,c) position, tail (r,c) position, and id integer.
     """
+    __slots__ = ("head", "tail", "id")
+
     def __init__(self, head: tuple[int, int], tail: tuple[int, int], id: int) -> None:
-        self.head = head
-        self.tail = tail
-        self.id = id
+        object.__setattr__(self, "head", head)
+        object.__setattr__(self, "tail", tail)
+        object.__setattr__(self, "id", id)
 
     def __str__(self) -> str:
         return f"Snake {self.id}: Head at {self.head}, Tail at {self.tail}"
@@ -148,15 +374,17 @@ class Snake():
         return f"Snake(id={self.id}, head={self.head}, tail={self.tail})"
 
 
-class Ladder():
+class Ladder(Entity):
     """
     Ladder class for SnakesAndLadders Game.
     Stores the bottom (r,c) position, top (r,c) position, and id integer.
     """
+    __slots__ = ("bottom", "top", "id")
+
     def __init__(self, bottom: tuple[int, int], top: tuple[int, int], id: int) -> None:
-        self.bottom = bottom
-        self.top = top
-        self.id = id 
+        object.__setattr__(self, "bottom", bottom)
+        object.__setattr__(self, "top", top)
+        object.__setattr__(self, "id", id)
 
     def __str__(self) -> str:
         return f"Ladder {self.id}: Bottom at {self.bottom}, Top at {self.top}"
@@ -179,21 +407,164 @@ class SnakesAndLadders(Game):
                 players: List[Player],
                 board_reader: "BoardReader",
                 get_btns_pressed: callable,
-                debug: bool) -> None:
+                debug: bool,
+                seed: int = None) -> None:
         
         super().__init__(n_rows, n_cols, players)
+        # All game randomness comes from rng, so a game can be replayed from its seed. See reseed
+        self.rng = random.Random()
         # Setup card manager
-        self.card_manager = CardManager()
+        self.card_manager = CardManager(self.rng, DECK_SIZE)
+        self.reseed(seed)
         self.current_card_id: int = 0
         # Populate the snakes and ladders for the game
-        self.snakes = self._make_snakes()
-        self.ladders = self._make_ladders()
+        self._snakes: List[Snake] = []
+        self._ladders: List[Ladder] = []
+        self.snakes, self.ladders = self._make_layout()
+        # Handlers run on state transitions, as (old state or None for any, new state or None for any, hook)
+        self._transition_hooks: List[tuple[SnakesLaddersGameState | None, SnakesLaddersGameState | None, Callable]] = []
+        # Time taken by each update_game step and transition, see get_timings
+        self.step_timings: Dict[str, Timing] = {name: Timing() for name, _, _ in UPDATE_STEPS}
+        self.transition_timings: Dict[tuple[SnakesLaddersGameState, SnakesLaddersGameState], Timing] = {}
+        self.unexpected_transitions: Dict[tuple[SnakesLaddersGameState, SnakesLaddersGameState], int] = {}
+        self._update_steps = [(name, state, getattr(self, method), self.step_timings[name]) for name, state, method in UPDATE_STEPS]
         # Start in GAMEPLAY state if players arg was not empty, otherwise start in SETUP state
-        self.state = SnakesLaddersGameState.GAMEPLAY if len(players) > 0 else SnakesLaddersGameState.SETUP
+        self._state = SnakesLaddersGameState.GAMEPLAY if len(players) > 0 else SnakesLaddersGameState.SETUP
         # Setup minigame manager for the game
         self.minigame_manager = minigames.MinigameManager(self.get_board_state, board_reader, get_btns_pressed, debug)
+        # Sends frames to the display. Replace to route a table's frames elsewhere, as for the minigame manager
+        self.send: Callable[[str], bool] = utils.send_json
         self.minigame_trigger = None
         self.minigame = None
+        # Records minigame results when set, see journal.GameJournal
+        self.journal = None
+        # Bitmask of the last board given to is_expected
+        self._scan_mask: int | None = 0
+        # Cache for get_json. The key holds everything the encoded state depends on
+        self._json_key: tuple | None = None
+        self._json: str = ""
+        # Encoded id, name and direction of each player, keyed by (index, name, direction)
+        self._player_json: Dict[tuple[int, str, int], str] = {}
+
+    @property
+    def state(self) -> SnakesLaddersGameState:
+        """
+        The game's current state. Changing it runs any matching transition hooks.
+        """
+        return self._state
+
+    @state.setter
+    def state(self, state: SnakesLaddersGameState) -> None:
+        old = self._state
+        self._state = state
+        if old != state:
+            self._on_transition(old, state)
+
+    def add_transition_hook(self, hook: Callable[[SnakesAndLadders, SnakesLaddersGameState, SnakesLaddersGameState], None],
+                            old: SnakesLaddersGameState = None, new: SnakesLaddersGameState = None) -> None:
+        """
+        Calls hook(game, old, new) whenever the game moves from state old to state new.
+        If old or new is None, hook is called for transitions from or to any state.
+        """
+        self._transition_hooks.append((old, new, hook))
+
+    def _on_transition(self, old: SnakesLaddersGameState, new: SnakesLaddersGameState) -> None:
+        """
+        Runs the transition hooks for old -> new and records how long they took.
+        """
+        start = perf_counter()
+        for hook_old, hook_new, hook in self._transition_hooks:
+            if (hook_old is None or hook_old == old) and (hook_new is None or hook_new == new):
+                hook(self, old, new)
+        timing = self.transition_timings.get((old, new))
+        if timing is None:
+            timing = self.transition_timings[(old, new)] = Timing()
+            if new not in TRANSITIONS[old]:
+                self.unexpected_transitions[(old, new)] = 0
+        timing.add(perf_counter() - start)
+        if (old, new) in self.unexpected_transitions:
+            self.unexpected_transitions[(old, new)] += 1
+
+    def get_timings(self) -> Dict:
+        """
+        Returns the count, total, mean and longest time in seconds of each update_game step and each
+        state transition so far, and how many times each unexpected transition happened.
+        """
+        return {
+            "steps": {name: timing.as_dict() for name, timing in self.step_timings.items()},
+            "transitions": {f"{GAMEPHASES[old.value]}->{GAMEPHASES[new.value]}": timing.as_dict()
+                            for (old, new), timing in self.transition_timings.items()},
+            "unexpectedTransitions": {f"{GAMEPHASES[old.value]}->{GAMEPHASES[new.value]}": count
+                                      for (old, new), count in self.unexpected_transitions.items()}
+        }
+
+    @property
+    def snakes(self) -> List[Snake]:
+        """
+        The snakes on the board. Assigning a new list updates the entity index.
+        """
+        return self._snakes
+
+    @snakes.setter
+    def snakes(self, snakes: List[Snake]) -> None:
+        self._snakes = snakes
+        self.update_entity_index()
+
+    @property
+    def ladders(self) -> List[Ladder]:
+        """
+        The ladders on the board. Assigning a new list updates the entity index.
+        """
+        return self._ladders
+
+    @ladders.setter
+    def ladders(self, ladders: List[Ladder]) -> None:
+        self._ladders = ladders
+        self.update_entity_index()
+
+    def update_entity_index(self) -> None:
+        """
+        Rebuilds the dicts from (r,c) position -> Snake head and (r,c) position -> Ladder bottom,
+        and the sorted tiles of snake heads and ladder bottoms used by next_snake and next_ladder.
+        Must be called after the snakes or ladders lists are modified in place.
+        If several entities share a position, the first in the list is used.
+        """
+        self._snake_index: Dict[tuple[int, int], Snake] = {}
+        for snake in self._snakes:
+            self._snake_index.setdefault(snake.head, snake)
+        self._ladder_index: Dict[tuple[int, int], Ladder] = {}
+        for ladder in self._ladders:
+            self._ladder_index.setdefault(ladder.bottom, ladder)
+        # Sorted (tile, index in list) of every snake head and ladder bottom
+        self._snake_tiles = sorted((self.geometry.tile(snake.head), i) for i, snake in enumerate(self._snakes))
+        self._ladder_tiles = sorted((self.geometry.tile(ladder.bottom), i) for i, ladder in enumerate(self._ladders))
+        # Outcomes of moves on this layout, built when first needed. See get_move_table
+        self._move_table: MoveTable | None = None
+        # Entities have changed so their cached JSON must be rebuilt
+        self._entities_json: str | None = None
+
+    def reseed(self, seed: int = None) -> int:
+        """
+        Seeds the game's random number generator with seed, or a random seed if None.
+        Any cards left in the card manager's deck are discarded, so the rest of the game depends only on the seed.
+        Returns the seed used.
+        """
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+        self.rng.seed(seed)
+        self.card_manager.shuffle()
+        return seed
+
+    def _make_layout(self) -> tuple[List[Snake], List[Ladder]]:
+        """
+        Picks a random layout from LAYOUT_POOL, so games last a predictable number of turns.
+        If there is no layout pool, snakes and ladders are selected at random from SNAKES and LADDERS.
+        """
+        if not LAYOUT_POOL:
+            return self._make_snakes(), self._make_ladders()
+        snakes, ladders = self.rng.choice(LAYOUT_POOL)
+        return [Snake(h, t, i) for i, (h,t) in enumerate(snakes)], [Ladder(b, t, i) for i, (b,t) in enumerate(ladders)]
 
     def _make_snakes(self, num_snakes: int = 7) -> List[Snake]:
         """
@@ -202,7 +573,7 @@ class SnakesAndLadders(Game):
         """
         if num_snakes < 0 or num_snakes > len(SNAKES):
             num_snakes = len(SNAKES)
-        return [Snake(h, t, i) for i, (h,t) in enumerate(random.sample(SNAKES, k=num_snakes))]
+        return [Snake(h, t, i) for i, (h,t) in enumerate(self.rng.sample(SNAKES, k=num_snakes))]
 
     def _make_ladders(self, num_ladders: int = 7) -> List[Ladder]:
         """
@@ -211,39 +582,25 @@ class SnakesAndLadders(Game):
         """
         if num_ladders < 0 or num_ladders > len(LADDERS):
             num_ladders = len(LADDERS)
-        return [Ladder(h, t, i) for i, (h,t) in enumerate(random.sample(LADDERS, k=num_ladders))]
+        return [Ladder(h, t, i) for i, (h,t) in enumerate(self.rng.sample(LADDERS, k=num_ladders))]
 
     def _roll_dice(self) -> int:
         """
         Return a random integer in the range [1, 6]
         """
-        return random.randint(1, 6)
+        return self.rng.randint(1, 6)
     
     def get_leader(self) -> Player | None:
         """
         Returns the player in the position closest to the finish.
-        In this instance, the player on the row closest to the top is returned.
-        If multiple players are in this row, the player closest to moving to the 
-        next row is returned.
+        Uses the game's standings, so this does not compare every player.
+        If multiple players are on the furthest tile, the one who joined first is returned.
         """
-        if not len(self.players) > 1:
+        if not len(self.players) > 1 or not self._standings:
             return self.players[0]
-        leader = self.players[0]
-        
-        for p in self.players:
-            if p.position is not None:
-                # compare row coords
-                if (p.position[0] < leader.position[0]):
-                    leader = p
-                # compare col coords
-                elif (p.position[0] == leader.position[0]):
-                    # odd row. Higher col number is ahead
-                    if (p.position[0] % 2 == 1) and (p.position[1] > leader.position[1]):
-                        leader = p
-                    # even row. Lower is ahead
-                    if (p.position[0] % 2 == 0) and (p.position[1] < leader.position[1]):
-                        leader = p
-        return leader
+        # Earliest joined player on the furthest tile
+        furthest = self._standings[-1][0]
+        return self._joined[self._standings[bisect_left(self._standings, (furthest, 0))][1]]
     
     def move_player(self, player: Player, num_spaces: int, minigames_enabled=True) -> tuple[int, int]:
         """
@@ -251,15 +608,38 @@ class SnakesAndLadders(Game):
         Sets the player's position to the first free space after num_spaces moves. 
         Appends player's intermediate_positions with up to num_spaces + 1 (r,c) positions.
         Checks for any snakes or ladders and sets the minigame_trigger flag when minigames_enabled is true.
+        The outcome is looked up in the layout's MoveTable unless another player is in the way.
         """
         # player.position == None, so start off board
         if player.position is None:
             player.position = (9, -1)
 
+        table = self._move_table if self._move_table is not None else self.get_move_table()
+        move = table.get(self.geometry.tile(player.position), num_spaces)
+        stops = (move.landing,) if minigames_enabled else move.stops
+        # The player's own tile is occupied by them, which doesn't block the move
+        occupancy, start = self._occupancy, player.position
+        blocked = any(occupancy.get(pos, 0) > (pos == start) for pos in stops) if occupancy else False
+        if (minigames_enabled or move.end is not None) and not blocked:
+            player.intermediate_positions += move.path
+            if minigames_enabled and move.trigger is not None:
+                self.minigame_trigger = move.trigger
+                player.position = move.landing
+                self.send(self.get_json()) #remove if unecessary
+            else:
+                player.position = move.landing if minigames_enabled else move.end
+            return player.position
+
+        return self._move_player_stepwise(player, num_spaces, minigames_enabled)
+
+    def _move_player_stepwise(self, player: Player, num_spaces: int, minigames_enabled: bool) -> tuple[int, int]:
+        """
+        Moves player as move_player does, one step at a time, bumping them forward off tiles other players occupy.
+        """
         # Move forward by num_spaces, collecting intermediate_positions
         (r, c) = self._move_spaces(player, num_spaces, True)
 
-        pos_occupied = any(p.position == (r, c) for p in self.players if p != player)
+        pos_occupied = self.is_occupied((r, c), player)
         entity = self._get_entity((r, c))
 
         # (Current (r,c) is occupied by another player) OR (player is on a snake head / ladder bottom)
@@ -274,18 +654,39 @@ class SnakesAndLadders(Game):
                 if minigames_enabled:
                     self.minigame_trigger = entity
                     player.position = (r, c)
-                    utils.send_json(self.get_json()) #remove if unecessary
+                    self.send(self.get_json()) #remove if unecessary
                     break
                 elif isinstance(entity, Snake):
                     (r, c) = entity.tail
                 elif isinstance(entity, Ladder):
                     (r, c) = entity.top
 
-            pos_occupied = any(p.position == (r, c) for p in self.players if p != player)
+            pos_occupied = self.is_occupied((r, c), player)
             entity = self._get_entity((r, c))
 
         player.position = (r, c)
         return (r, c)
+
+    def get_roll_outcomes(self, player: Player) -> list[Move]:
+        """
+        Returns the moves player would make for each dice roll from 1 to 6, ignoring other players in the way.
+        e.g. for previewing every outcome before the dice is rolled.
+        """
+        tile = self.geometry.tile(player.position) if player.position is not None else 0
+        table = self.get_move_table()
+        return [table.get(tile, roll) for roll in range(1, 7)]
+
+    def get_move_table(self) -> MoveTable:
+        """
+        Returns the MoveTable of the current layout, building it if the snakes or ladders have changed.
+        """
+        if self._move_table is None:
+            # Snakes take priority over ladders on the same tile, as in _get_entity
+            tile = self.geometry.tile
+            entities = {tile(ladder.bottom): (ladder, tile(ladder.top)) for ladder in reversed(self._ladders)}
+            entities.update({tile(snake.head): (snake, tile(snake.tail)) for snake in reversed(self._snakes)})
+            self._move_table = MoveTable(self.geometry, entities)
+        return self._move_table
     
     def _move_spaces(self, player: Player, num_spaces: int, collect_intermediates: bool = False) -> tuple[int, int]:
         """
@@ -294,63 +695,87 @@ class SnakesAndLadders(Game):
         Returns the end (r,c) position player reaches after moving num_spaces.
         DOES NOT check if the space is occupied, use move_player if that functionality is desired.
         """
-        (r,c) = player.position
-        # Iterate through positions, collecting intermediates if collect_intermediates is set
-        for _ in range((num_spaces)):
-            # Collect intermediates if set
-            if collect_intermediates:
-                player.intermediate_positions.append((r, c))
-            # End of row. Move ^
-            if ((r % 2 == 0) and c <= 0) or ((r % 2 == 1) and c >= self.n_cols - 1):
-                r -= 1
-            # Odd row. Move ->
-            elif r % 2 == 1:
-                c += 1
-            # Even row. Move <-
-            else:       
-                c -= 1
-        player.position = (r,c)
-        return (r, c)
+        start = self.geometry.tile(player.position)
+        end = start + max(num_spaces, 0)
+        # Collect intermediates if set
+        if collect_intermediates:
+            player.intermediate_positions += self.geometry.path(start, end)
+        player.position = self.geometry.position(end)
+        return player.position
     
     def _get_entity(self, pos: tuple[int, int]) -> Snake | Ladder | None:
         """
         Returns the Snake or Ladder at pos if one exists.
         Otherwise returns None.
         """
-        entity = self._get_snake(pos)
+        entity = self._snake_index.get(pos)
         if not entity:
-            entity = self._get_ladder(pos)
+            entity = self._ladder_index.get(pos)
         return entity
 
+    def next_snake(self, tile: int) -> Snake | None:
+        """
+        Returns the snake whose head is on the nearest tile after tile, or None if there are no snakes ahead.
+        If several snakes share that tile, the first in the list is returned.
+        """
+        i = bisect_right(self._snake_tiles, (tile, len(self._snakes)))
+        return self._snakes[self._snake_tiles[i][1]] if i < len(self._snake_tiles) else None
+
+    def next_ladder(self, tile: int) -> Ladder | None:
+        """
+        Returns the ladder whose bottom is on the nearest tile after tile, or None if there are no ladders ahead.
+        If several ladders share that tile, the first in the list is returned.
+        """
+        i = bisect_right(self._ladder_tiles, (tile, len(self._ladders)))
+        return self._ladders[self._ladder_tiles[i][1]] if i < len(self._ladder_tiles) else None
+
+    def next_entity(self, tile: int) -> Snake | Ladder | None:
+        """
+        Returns the snake or ladder that starts on the nearest tile after tile, or None if there are none ahead.
+        A snake is returned if a snake and a ladder start on the same tile, as in _get_entity.
+        """
+        snake, ladder = self.next_snake(tile), self.next_ladder(tile)
+        if snake is None or ladder is None:
+            return snake or ladder
+        return snake if self.geometry.tile(snake.head) <= self.geometry.tile(ladder.bottom) else ladder
+
     def _get_snake(self, pos: tuple[int, int]) -> Snake | None:
         """
         Returns the Snake at pos if one exists.
         Otherwise returns None.
         """
-        for snake in self.snakes:
-                if pos == snake.head:
-                    return snake
-        return None
+        return self._snake_index.get(pos)
     
     def _get_ladder(self, pos: tuple[int, int]) -> Ladder | None:
         """
         Returns the Ladder at pos if one exists.
         Otherwise returns None.
         """
-        for ladder in self.ladders:
-                if pos == ladder.bottom:
-                    return ladder
-        return None
+        return self._ladder_index.get(pos)
     
     def is_expected(self, current_board: list[tuple[int,int]]) -> bool:
         """
         Compares current_board with stored board_positions (i.e. all player posiitons). Order insensitive.
         Returns True if every (r,c) position in current_board matches with a player position.
         Returns False otherwise.
+        The expected positions are kept as a bitmask as players move, so only current_board needs converting.
+        The scan is kept so get_board_diff can report which squares are wrong.
         """
-        if sorted(current_board) == sorted(self.get_player_positions()):
-            return True
-        return False
+        self._scan_mask = self.geometry.mask(current_board)
+        return (self._scan_mask == self._expected_mask and
+                len(current_board) == self._expected_squares == self._positioned)
+
+    def get_board_diff(self) -> tuple[list[tuple[int,int]], list[tuple[int,int]]]:
+        """
+        Compares the board last given to is_expected with the expected player positions.
+        Returns (missing, extra) where missing are squares that should have a piece but don't,
+        and extra are squares that have a piece but shouldn't.
+        """
+        if self._scan_mask is None:
+            return [], []
+        missing = self._expected_mask & ~self._scan_mask
+        extra = self._scan_mask & ~self._expected_mask
+        return self.geometry.mask_positions(missing), self.geometry.mask_positions(extra)
 
     def handle_setup_state(self, current_board: list[tuple[int,int]], btn_1_pressed: bool, btn_2_pressed: bool) -> None:
         """
@@ -411,7 +836,7 @@ class SnakesAndLadders(Game):
                 return 
 
             # Player added to game!
-            self.players.append(Player(clr, direction, new_pos))
+            self.add_player(Player(clr, direction, new_pos))
             print("Added", clr, "player with direction", direction)
 
         # All players added, want to start game
@@ -435,59 +860,86 @@ class SnakesAndLadders(Game):
     def update_game(self, current_board: list[tuple[int,int]], btn_1_pressed: bool, btn_2_pressed: bool) -> None:
         """
         Is called ONCE each time the board changes, or a button is pressed.
-        Handles game logic based on given args, stored state, and variables.
+        Handles game logic based on given args, stored state, and variables, by running the steps in UPDATE_STEPS.
         """
-        # Handle game over state.
-        if self.state == SnakesLaddersGameState.GAME_OVER:
-            self.handle_game_over_state(btn_2_pressed)
-            return
+        for _, state, step, timing in self._update_steps:
+            if state is not None and self._state != state:
+                continue
+            start = perf_counter()
+            done = step(current_board, btn_1_pressed, btn_2_pressed)
+            timing.add(perf_counter() - start)
+            if done:
+                return
+
+    def _step_game_over(self, current_board: list[tuple[int,int]], btn1: bool, btn2: bool) -> bool:
+        """
+        Handles game over state.
+        """
+        self.handle_game_over_state(btn2)
+        return True
 
-        # Game over. Change state to 'gameover', then return
+    def _step_check_game_over(self, current_board: list[tuple[int,int]], btn1: bool, btn2: bool) -> bool:
+        """
+        Game over. Change state to 'gameover', then end the pass.
+        """
         if self.is_game_over():
             self.current_turn = self.players.index(self.get_leader())
             self.state = SnakesLaddersGameState.GAME_OVER
-            return
+            return True
+        return False
 
-        # Setup game. Should only happen at start of game until all setup is done
-        if self.state == SnakesLaddersGameState.SETUP:
-            self.handle_setup_state(current_board, btn_1_pressed, btn_2_pressed)
-            return
+    def _step_setup(self, current_board: list[tuple[int,int]], btn1: bool, btn2: bool) -> bool:
+        """
+        Setup game. Should only happen at start of game until all setup is done.
+        """
+        self.handle_setup_state(current_board, btn1, btn2)
+        return True
 
-        # Tells current player it's their turn and to draw a card
-        if self.state == SnakesLaddersGameState.GAMEPLAY:
-            self.handle_gameplay_state(current_board, btn_1_pressed, btn_2_pressed)
+    def _step_gameplay(self, current_board: list[tuple[int,int]], btn1: bool, btn2: bool) -> bool:
+        """
+        Tells current player it's their turn and to draw a card.
+        """
+        self.handle_gameplay_state(current_board, btn1, btn2)
+        return False
 
-        # Handle card drawing and rules. Will be run in the same call the state changes from 'gameplay' to 'drawcard'
-        if self.state == SnakesLaddersGameState.DRAWCARD and not self.minigame_trigger:
-            self.handle_drawcard_state(current_board, btn_1_pressed, btn_2_pressed)
-        
-        # Incorrect Board State. Will be run in the same call the state changes from either 'gameplay' or 'drawcard' to 'incorrect-square'
-        if self.state == SnakesLaddersGameState.INCORRECT_SQUARE:
-            
-            for p in self.players:
-                p.intermediate_positions = []
-            
-            if self.is_expected(current_board):
-                
-                # Card still needs to be resolved, return to 'drawcard' state
-                if self.card_manager.current is not None:
-                    self.state = SnakesLaddersGameState.DRAWCARD
-                # Return to 'gameplay' state
-                else:
-                    self.state = SnakesLaddersGameState.GAMEPLAY
-        
+    def _step_drawcard(self, current_board: list[tuple[int,int]], btn1: bool, btn2: bool) -> bool:
+        """
+        Handle card drawing and rules. Will be run in the same pass the state changes from 'gameplay' to 'drawcard'.
+        Waits while a minigame is to be played.
+        """
+        if not self.minigame_trigger:
+            self.handle_drawcard_state(current_board, btn1, btn2)
+        return False
+
+    def _step_incorrect_square(self, current_board: list[tuple[int,int]], btn1: bool, btn2: bool) -> bool:
+        """
+        Incorrect Board State. Will be run in the same pass the state changes from either 'gameplay' or 'drawcard' to 'incorrect-square'.
+        """
+        for p in self.players:
+            p.intermediate_positions = []
+
+        if self.is_expected(current_board):
+
+            # Card still needs to be resolved, return to 'drawcard' state
+            if self.card_manager.current is not None:
+                self.state = SnakesLaddersGameState.DRAWCARD
+            # Return to 'gameplay' state
+            else:
+                self.state = SnakesLaddersGameState.GAMEPLAY
+        return False
 
-        # Initialise a new minigame
+    def _step_minigame(self, current_board: list[tuple[int,int]], btn1: bool, btn2: bool) -> bool:
+        """
+        Initialises a new minigame once one has been triggered, then handles it on later passes.
+        """
         if self.minigame_trigger is not None and self.minigame is None:
             exclusions = [p for p in self.get_player_positions() if p != self.get_current_player().position]
-
             self.minigame = self.minigame_manager.new_minigame(self.get_current_player(), exclusions)
-            #self.state = SnakesLaddersGameState.MINIGAME
 
-        # Handle minigame
         elif self.minigame is not None:
             self.state = SnakesLaddersGameState.MINIGAME
-            self.handle_minigame_state(current_board, btn_1_pressed, btn_2_pressed)
+            self.handle_minigame_state(current_board, btn1, btn2)
+        return False
 
     def handle_gameplay_state(self, current_board: list[tuple[int,int]], btn1: bool, btn2: bool) -> None:
         """
@@ -510,13 +962,15 @@ class SnakesAndLadders(Game):
         Draws a new card if none are active and applies that card's effects if it should be resolved immediately. e.g. DiceRollCard
         """
         card = self.card_manager.current
+        # How the card is resolved is looked up by its id, see CARD_TABLE
+        resolve = CARD_TABLE.resolve[card.card_id] if card is not None else None
 
         # Handle Dice roll duel card
-        if isinstance(card, DiceRollDuelCard):
+        if resolve == RESOLVE_DUEL:
             self.handle_dice_roll_duel(current_board, btn1, btn2, card)
 
-        # Handle Oversleep card
-        elif isinstance(card, OversleepCard) or isinstance(card, SwapSnakesAndLaddersCard):
+        # Handle cards that end the turn straight away, e.g. Oversleep
+        elif resolve == RESOLVE_NEXT_INPUT:
             self.end_turn()
             return
         
@@ -530,7 +984,7 @@ class SnakesAndLadders(Game):
             self.card_manager.current = card
             # Ensure the first turn for each player is a RollDiceCard
             if self.current_turn < len(self.players):
-                card = RollDiceCard()
+                card = self.card_manager.make_card(RollDiceCard)
             
             self.current_card_id = card.card_id
             card.apply(self, self.get_current_player())
@@ -540,9 +994,9 @@ class SnakesAndLadders(Game):
         ###
 
         # Movement Cards
-        elif isinstance(card, RollDiceCard) or isinstance(card, DescendSnakeCard) or isinstance(card, JumpAheadCard) or isinstance(card, HelpingHandCard) or isinstance(card, SwapWithLeadCard):
+        elif resolve == RESOLVE_BOARD:
 
-            if sorted(current_board) == sorted(self.get_player_positions()):
+            if self.is_expected(current_board):
                 self.end_turn()
                 return
             
@@ -598,12 +1052,11 @@ class SnakesAndLadders(Game):
         When btn2 is True, resets all game variables and begins new game in the setup state.
         """
         if btn2:
-            # Setup card manager
-            self.card_manager = CardManager()
+            # Setup card manager, keeping the deck mode of the game just played
+            self.card_manager = CardManager(self.rng, self.card_manager.deck_size)
             self.current_card_id: int = 0
             # Populate the snakes and ladders for the game
-            self.snakes = self._make_snakes()
-            self.ladders = self._make_ladders()
+            self.snakes, self.ladders = self._make_layout()
             # Reinitialise variables
             self.players = []
             self.current_turn = 0
@@ -623,6 +1076,8 @@ class SnakesAndLadders(Game):
         elif self.minigame.status == minigames.MinigameStatus.START and (btn_1_pressed or btn_2_pressed):
             # player pressed btn to confirm start of minigame
             win = self.minigame_manager.play()
+            if self.journal is not None:
+                self.journal.record_minigame(win)
             # check for all possible outcomes
             player = self.get_current_player() # convenience alias
             if win and isinstance(self.minigame_trigger, Ladder):
@@ -675,7 +1130,7 @@ class SnakesAndLadders(Game):
         i.e. Any player's position, (r,c) == (0,0) or r < 0
         """
         for p in self.players:
-            if p.position is not None and (p.position == (0,0) or p.position[0] < 0):
+            if p.position is not None and self.geometry.is_finished(self.geometry.tile(p.position)):
                 return True
         return False
 
@@ -683,7 +1138,7 @@ class SnakesAndLadders(Game):
         """
         Returns the game's data as a dict representing JSON format.
         """
-        return {
+        board_state = {
             "gameType": "SnakesLadders",
             "gamePhase": GAMEPHASES[self.state.value],  # Include gamePhase
             "cardID": self.current_card_id,
@@ -698,31 +1153,166 @@ class SnakesAndLadders(Game):
                     # "effects": player.effects
                 } for i, player in enumerate(self.players)
             ],
-            "entities": [
-                {
-                    "type": "snake",
-                    "id": f"s{i+1}",
-                    "start": snake.head,
-                    "end": snake.tail
-                } for i, snake in enumerate(self.snakes)
-            ] + [
-                {
-                    "type": "ladder",
-                    "id": f"l{i+1}",
-                    "start": ladder.bottom,
-                    "end": ladder.top
-                } for i, ladder in enumerate(self.ladders)
-            ]
+            "entities": self.get_entities()
         }
+        # Tell players which squares need fixing
+        if self.state == SnakesLaddersGameState.INCORRECT_SQUARE:
+            missing, extra = self.get_board_diff()
+            board_state["missingSquares"] = missing
+            board_state["extraSquares"] = extra
+        return board_state
+
+    def get_entities(self) -> List[Dict]:
+        """
+        Returns the snakes and ladders as a list of dicts representing JSON format.
+        """
+        return [
+            {
+                "type": "snake",
+                "id": f"s{i+1}",
+                "start": snake.head,
+                "end": snake.tail
+            } for i, snake in enumerate(self.snakes)
+        ] + [
+            {
+                "type": "ladder",
+                "id": f"l{i+1}",
+                "start": ladder.bottom,
+                "end": ladder.top
+            } for i, ladder in enumerate(self.ladders)
+        ]
 
     def get_json(self) -> str:
         """
-        Returns the game's data as a str in JSON format.
+        Returns the game's data as a str in minified JSON format.
+        The result is cached, and is only encoded again once something it contains has changed.
+        Entities and player details rarely change, so their encoded JSON is cached separately
+        and reused when only positions or the game phase change.
         """
-        board_state = self.get_board_state()
         if self.state == SnakesLaddersGameState.MINIGAME and self.minigame:
-            board_state = self.minigame.get_board_data()
-        return json.dumps(board_state, indent=4)
+            return self.minigame.get_json()
+
+        if self._entities_json is None:
+            self._entities_json = json.dumps(self.get_entities(), separators=utils.JSON_SEPARATORS)
+        current_player = self.get_current_player()
+        key = (
+            self.state,
+            self.current_card_id,
+            current_player.name if current_player is not None else "",
+            self._entities_json,
+            tuple((p.name, p.direction, p.position, tuple(p.intermediate_positions)) for p in self.players),
+            self._scan_mask if self.state == SnakesLaddersGameState.INCORRECT_SQUARE else None
+        )
+        if key == self._json_key:
+            return self._json
+
+        dumps = lambda obj: json.dumps(obj, separators=utils.JSON_SEPARATORS)
+        players = []
+        for i, player in enumerate(self.players):
+            details = self._player_json.get((i, player.name, player.direction))
+            if details is None:
+                details = dumps({"id": f"p{i}", "name": player.name, "direction": player.direction})[:-1]
+                self._player_json[(i, player.name, player.direction)] = details
+            players.append(f'{details},"position":{dumps(player.position)},'
+                           f'"intermediatePositions":{dumps(player.intermediate_positions)}}}')
+        board_json = (f'{{"gameType":"SnakesLadders","gamePhase":{dumps(GAMEPHASES[self.state.value])},'
+                      f'"cardID":{dumps(self.current_card_id)},"currentPlayer":{dumps(key[2])},'
+                      f'"players":[{",".join(players)}],"entities":{self._entities_json}')
+        # Tell players which squares need fixing
+        if self.state == SnakesLaddersGameState.INCORRECT_SQUARE:
+            missing, extra = self.get_board_diff()
+            board_json += f',"missingSquares":{dumps(missing)},"extraSquares":{dumps(extra)}'
+        self._json_key = key
+        self._json = board_json + "}"
+        return self._json
+
+    def snapshot(self) -> bytes:
+        """
+        Returns the game's state in a compact binary form that restore can load.
+        Covers the players, snakes, ladders, turn, state, current card and minigame trigger.
+        A minigame in progress is not included, and is started again from the beginning on restore.
+        """
+        card = self.card_manager.current
+        card_index = self.card_manager.deck.index(type(card)) if card is not None else -1
+        first_roll = getattr(card, "first_roll", None) or 0
+        second_roll = getattr(card, "second_roll", None) or 0
+        trigger_kind, trigger_index = _NO_TRIGGER, 0
+        if isinstance(self.minigame_trigger, Snake):
+            trigger_kind, trigger_index = _SNAKE_TRIGGER, self.snakes.index(self.minigame_trigger)
+        elif isinstance(self.minigame_trigger, Ladder):
+            trigger_kind, trigger_index = _LADDER_TRIGGER, self.ladders.index(self.minigame_trigger)
+
+        parts = [_SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self.n_rows, self.n_cols, self.state.value,
+            self.current_turn, self.current_card_id, card_index, first_roll, second_roll,
+            trigger_kind, trigger_index, len(self.players), len(self.snakes), len(self.ladders)
+        )]
+        for player in self.players:
+            name = player.name.encode()
+            position = player.position if player.position is not None else _NO_POSITION
+            parts.append(bytes([len(name)]) + name)
+            parts.append(_SNAPSHOT_PLAYER.pack(player.direction, *position, len(player.intermediate_positions)))
+            parts.extend(_SNAPSHOT_POSITION.pack(*pos) for pos in player.intermediate_positions)
+        parts.extend(_SNAPSHOT_ENTITY.pack(*snake.head, *snake.tail) for snake in self.snakes)
+        parts.extend(_SNAPSHOT_ENTITY.pack(*ladder.bottom, *ladder.top) for ladder in self.ladders)
+        return b"".join(parts)
+
+    def restore(self, data: bytes) -> None:
+        """
+        Replaces the game's state with a snapshot returned by snapshot.
+        Raises ValueError if data is not a snapshot of a game on a board of the same size.
+        """
+        try:
+            (magic, version, n_rows, n_cols, state, current_turn, current_card_id, card_index, first_roll,
+             second_roll, trigger_kind, trigger_index, n_players, n_snakes, n_ladders) = _SNAPSHOT_HEADER.unpack_from(data)
+            if magic != SNAPSHOT_MAGIC or version not in _SNAPSHOT_PLAYERS:
+                raise ValueError("Not a game snapshot, or from an unsupported version")
+            player_struct = _SNAPSHOT_PLAYERS[version]
+            if (n_rows, n_cols) != (self.n_rows, self.n_cols):
+                raise ValueError(f"Snapshot is of a {n_rows}x{n_cols} board, not {self.n_rows}x{self.n_cols}")
+
+            offset = _SNAPSHOT_HEADER.size
+            players = []
+            for _ in range(n_players):
+                name = data[offset + 1:offset + 1 + data[offset]].decode()
+                offset += 1 + data[offset]
+                direction, r, c, n_intermediates = player_struct.unpack_from(data, offset)
+                offset += player_struct.size
+                player = Player(name, direction, (r, c) if (r, c) != _NO_POSITION else None)
+                player.intermediate_positions = [_SNAPSHOT_POSITION.unpack_from(data, offset + i * _SNAPSHOT_POSITION.size)
+                                                 for i in range(n_intermediates)]
+                offset += n_intermediates * _SNAPSHOT_POSITION.size
+                players.append(player)
+            entities = [_SNAPSHOT_ENTITY.unpack_from(data, offset + i * _SNAPSHOT_ENTITY.size)
+                        for i in range(n_snakes + n_ladders)]
+            snakes = [Snake((hr, hc), (tr, tc), i) for i, (hr, hc, tr, tc) in enumerate(entities[:n_snakes])]
+            ladders = [Ladder((br, bc), (tr, tc), i) for i, (br, bc, tr, tc) in enumerate(entities[n_snakes:])]
+            trigger = (snakes[trigger_index] if trigger_kind == _SNAKE_TRIGGER else
+                       ladders[trigger_index] if trigger_kind == _LADDER_TRIGGER else None)
+            card = self.card_manager.make_card(self.card_manager.deck[card_index]) if card_index >= 0 else None
+            state = SnakesLaddersGameState(state)
+        except (struct.error, IndexError, UnicodeDecodeError) as e:
+            raise ValueError(f"Corrupt game snapshot: {e}") from e
+
+        # Nothing is changed until the whole snapshot has been decoded, so a corrupt one leaves the game as it was
+        self.players = players
+        self.current_turn = current_turn
+        self.snakes = snakes
+        self.ladders = ladders
+        self.current_card_id = current_card_id
+        if isinstance(card, DiceRollDuelCard):
+            card.first_roll = first_roll or None
+            card.second_roll = second_roll or None
+        self.card_manager.current = card
+        self.minigame_trigger = trigger
+        self.minigame = None
+        # A minigame that was already played only needed confirming, so carry on resolving the card
+        if state == SnakesLaddersGameState.MINIGAME and self.minigame_trigger is None:
+            state = SnakesLaddersGameState.DRAWCARD
+        # Restoring isn't a transition the game made, so skips the transition hooks
+        self._state = state
+        self._scan_mask = 0
+        self._json_key = None
 
     def pretty_print_board(self) -> None:
         """
@@ -1,102 +1,163 @@
 # game_components.py
 
-from abc import ABC, abstractmethod
+import json
+import os
 import random
-POSITION_TO_NUM = {(0, 0): 100, (0, 1): 99, (0, 2): 98, (0, 3): 97, (0, 4): 96, (0, 5): 95, (0, 6): 94, (0, 7): 93, (0, 8): 92, (0, 9): 91, (1, 9): 90, (1, 8): 89, (1, 7): 88, (1, 6): 87, (1, 5): 86, (1, 4): 85, (1, 3): 84, (1, 2): 83, (1, 1): 82, (1, 0): 81, (2, 0): 80, (2, 1): 79, (2, 2): 78, (2, 3): 77, (2, 4): 76, (2, 5): 75, (2, 6): 74, (2, 7): 73, (2, 8): 72, (2, 9): 71, (3, 9): 70, (3, 8): 69, (3, 7): 68, (3, 6): 67, (3, 5): 66, (3, 4): 65, (3, 3): 64, (3, 2): 63, (3, 1): 62, (3, 0): 61, (4, 0): 60, (4, 1): 59, (4, 2): 58, (4, 3): 57, (4, 4): 56, (4, 5): 55, (4, 6): 54, (4, 7): 53, (4, 8): 52, (4, 9): 51, (5, 9): 50, (5, 8): 49, (5, 7): 48, (5, 6): 47, (5, 5): 46, (5, 4): 45, (5, 3): 44, (5, 2): 43, (5, 1): 42, (5, 0): 41, (6, 0): 40, (6, 1): 39, (6, 2): 38, (6, 3): 37, (6, 4): 36, (6, 5): 35, (6, 6): 34, (6, 7): 33, (6, 8): 32, (6, 9): 31, (7, 9): 30, (7, 8): 29, (7, 7): 28, (7, 6): 27, (7, 5): 26, (7, 4): 25, (7, 3): 24, (7, 2): 23, (7, 1): 22, (7, 0): 21, (8, 0): 20, (8, 1): 19, (8, 2): 18, (8, 3): 17, (8, 4): 16, (8, 5): 15, (8, 6): 14, (8, 7): 13, (8, 8): 12, (8, 9): 11, (9, 9): 10, (9, 8): 9, (9, 7): 8, (9, 6): 7, (9, 5): 6, (9, 4): 5, (9, 3): 4, (9, 2): 3, (9, 1): 2, (9, 0): 1}
-# Abstract Card Class
-class Card(ABC):
+import re
+from typing import Callable
+from .board_geometry import get_geometry
+
+# A dict from Position -> Number on the standard 10x10 board.
+POSITION_TO_NUM = get_geometry(10, 10).squares()
+
+# Declarative definitions of every card in the deck, in deck order. See load_card_definitions
+CARDS_PATH = os.path.join(os.path.dirname(__file__), "cards.json")
+
+# How the 'drawcard' state resolves a card once it has been applied, see SnakesAndLadders.handle_drawcard_state
+RESOLVE_BOARD = "board"           # The turn ends once the pieces are where the display shows them
+RESOLVE_NEXT_INPUT = "next_input" # The turn ends on the next input
+RESOLVE_DUEL = "duel"             # Played out by SnakesAndLadders.handle_dice_roll_duel
+RESOLVE_KINDS = (RESOLVE_BOARD, RESOLVE_NEXT_INPUT, RESOLVE_DUEL)
+
+class Card:
     """
-    Abstract card superclass
+    Card superclass. A card's name, description, id and effect come from its definition in CARDS_PATH.
+    Cards with no per-draw state are shared between draws, see CardManager.make_card.
+    Subclasses with per-draw state must set SHARED = False.
+    Roll Dice cards show the dice roll, and have the id of their definition plus roll.
+    If roll is None, a Roll Dice card rolls its own dice with rng, or the random module if None.
     """
-    def __init__(self, name: str, description: str, card_id: int):
-        self.name = name
-        self.description = description
-        self.card_id = card_id
+    __slots__ = ("name", "description", "card_id")
+    SHARED = True
+
+    def __init__(self, roll: int = None, rng: random.Random = None):
+        definition = CARD_TABLE.by_type[type(self)]
+        self.name = definition.name
+        self.description = definition.description
+        if definition.effect == "roll_dice":
+            if roll is None:
+                roll = (rng or random).randint(1, 6)
+            elif not 1 <= roll <= 6:
+                raise ValueError(f"{definition.name} card roll must be 1 to 6, not {roll}")
+        self.card_id = definition.card_id + (roll or 0)
 
-    @abstractmethod
     def apply(self, game, player) -> None:
         """
-        Apply card effects. Might need to add current_board, btn1, and btn2 for expanded functionality
+        Apply card effects, using the effect compiled for the card's id.
         """
-        pass
+        CARD_TABLE.effects[self.card_id](game, player, self)
 
-# Card Implementations
+# Card types referred to by name in CARDS_PATH. Cards defined without a type get a new subclass of Card
 class RollDiceCard(Card):
     """
     Simple and most common card in deck. Moves player position forward by 1-6 spaces when applied.
     """
-    def __init__(self):
-        super().__init__("Roll Dice", "Roll a dice and move forward.", 0)
-        self.card_id = 22 + random.randint(1,6)
-
-    def apply(self, game, player):
-        roll = self.card_id - 22
-        print(f"{player.name} rolled a {roll}.")
-        game.move_player(player, roll)
+    __slots__ = ()
 
 class OversleepCard(Card):
     """
     "Do Nothing" card. This card does nothing. Effectively skips the player's turn.
     """
-    def __init__(self):
-        super().__init__("Oversleep", "Do nothing this turn.", 2)
-
-    def apply(self, game, player):
-        print(f"{player.name} overslept and does nothing this turn.")
+    __slots__ = ()
 
 class SwapWithLeadCard(Card):
     """
     Swaps the current player with the player in the lead. No effect if the current player is already in the lead.
     """
-    def __init__(self):
-        super().__init__("Swap with Leader", "Swap positions with the current leader.", 29)
-
-    def apply(self, game, player):
-        leader = game.get_leader()
-        if leader != player:
-            print(f"{player.name} swaps with {leader.name}.")
-            player.position, leader.position = leader.position, player.position
-        else:
-            print(f"{player.name} is already the leader.")
+    __slots__ = ()
 
 class DiceRollDuelCard(Card):
     """
     Initiate a duel between the current player and the player in the lead. No effect if the current player is already the leader. DEPRECATED
     """
-    def __init__(self):
-        super().__init__("Dice Roll Duel", "Trigger a dice roll duel with the leader.", 1)
+    __slots__ = ("first_roll", "second_roll")
+    SHARED = False
+
+    def __init__(self, roll: int = None, rng: random.Random = None):
+        super().__init__(roll, rng)
         self.first_roll = None
         self.second_roll = None
 
-    def apply(self, game, player):
-        pass
-
 class DescendSnakeCard(Card):
     """
     If a snake is ahead of the current player, move that player to the snake's tail.
     """
-    def __init__(self):
-        super().__init__("Descend the Next Snake", "Move forward to the head of the next snake, then slide to its tail.", 5)
+    __slots__ = ()
+
+class JumpAheadCard(Card):
+    """
+    All players move ahead by one space, automatically climbing a ladder, or falling down a snake if they land on one.
+    """
+    __slots__ = ()
+
+class HelpingHandCard(Card):
+    """
+    The player in the last position moves up to to the square behind the player in the second-last position.
+    """
+    __slots__ = ()
+
+class SwapSnakesAndLaddersCard(Card):
+    """
+    Replaces all snakes with ladders and all ladders with snakes.
+    Players previously on a snake tail or a ladder will move foward one space.
+    """
+    __slots__ = ()
+
+CARD_TYPES = {card_type.__name__: card_type for card_type in (
+    RollDiceCard, OversleepCard, SwapWithLeadCard, DiceRollDuelCard, DescendSnakeCard,
+    JumpAheadCard, HelpingHandCard, SwapSnakesAndLaddersCard)}
+
+# Effect primitives. Each takes a definition's params and returns the function applying the effect,
+# called as effect(game, player, card) with the player whose turn it is
+
+def _roll_dice(roll: int) -> Callable:
+    """
+    The player moves roll spaces, playing a minigame if they stop on a snake or ladder.
+    """
+    def effect(game, player, card):
+        print(f"{player.name} rolled a {roll}.")
+        game.move_player(player, roll)
+    return effect
+
+def _no_effect() -> Callable:
+    """
+    Nothing happens.
+    """
+    def effect(game, player, card):
+        print(f"{player.name} drew {card.name}. It has no effect this turn.")
+    return effect
+
+def _swap_with_leader() -> Callable:
+    """
+    The player swaps positions with the leader, if they aren't the leader.
+    """
+    def effect(game, player, card):
+        leader = game.get_leader()
+        if leader != player:
+            print(f"{player.name} swaps with {leader.name}.")
+            player.position, leader.position = leader.position, player.position
+        else:
+            print(f"{player.name} is already the leader.")
+    return effect
 
-    def apply(self, game, player):
+def _descend_snake() -> Callable:
+    """
+    The player moves to the head of the nearest snake ahead of them, then slides to its tail.
+    """
+    def effect(game, player, card):
         print(f"{player.name} is descending the next snake.")
-        
-        # Current player position in (row, col) format
-        player_position = player.position
-        player_num = POSITION_TO_NUM[player_position]
-
-        # Find all snakes with head above the player's current number
-        snakes_ahead = [snake for snake in game.snakes if POSITION_TO_NUM[snake.head] > player_num]
-
-        if snakes_ahead:
-            # Find the nearest snake head by the difference in numbers
-            nearest_snake = min(snakes_ahead, key=lambda snake: POSITION_TO_NUM[snake.head] - player_num)
-            snake_head_num = POSITION_TO_NUM[nearest_snake.head]
+
+        player_num = game.geometry.tile(player.position)
+
+        # Nearest snake head after the player's tile, found by binary search
+        nearest_snake = game.next_snake(player_num)
+
+        if nearest_snake is not None:
+            snake_head_num = game.geometry.tile(nearest_snake.head)
             num_spaces_to_move = snake_head_num - player_num
-            
+
             print(f"{player.name} will move {num_spaces_to_move} spaces to reach Snake {nearest_snake.id} at {nearest_snake.head}.")
-            #game.move_player(player, num_spaces_to_move, minigames_enabled=False)
-            
+
             # Collect intermediate_positions
             game._move_spaces(player, num_spaces_to_move, collect_intermediates=True)
             player.intermediate_positions.append(player.position)
@@ -106,44 +167,35 @@ class DescendSnakeCard(Card):
             game.move_player(player, 0, False)
         else:
             print("No snakes found ahead of player.")
+    return effect
 
-class JumpAheadCard(Card):
+def _all_forward(spaces: int) -> Callable:
     """
-    All players move ahead by one space, automatically climbing a ladder, or falling down a snake if they land on one.
+    Every player moves spaces ahead, furthest first, climbing ladders and sliding down snakes without minigames.
     """
-    def __init__(self):
-        super().__init__("Jump Ahead", "All players move one space ahead.", 7)
-
-    def apply(self, game, player):
-        print("All players are moving one space ahead.")
+    def effect(game, player, card):
+        print(f"All players are moving {spaces} spaces ahead.")
         # Iterate through players by their current position on the board
-        for p in sorted(game.players, key=lambda p: POSITION_TO_NUM[p.position], reverse=True):
-            print(f"{p.name} is moving one space ahead.")
-            game.move_player(p, 1, minigames_enabled=False)
+        for p in game.get_standings():
+            print(f"{p.name} is moving {spaces} spaces ahead.")
+            game.move_player(p, spaces, minigames_enabled=False)
+    return effect
 
-class HelpingHandCard(Card):
+def _helping_hand() -> Callable:
     """
-    The player in the last position moves up to to the square behind the player in the second-last position.
+    The player in last place moves up to the square behind the next player ahead of them.
     """
-    def __init__(self):
-        super().__init__("Helping Hand", "The player in last position moves up to the square behind the next player in front of them.", 9)
-
-    def apply(self, game, player):
-        # Sort players by their current position on the board
-        sorted_players = sorted(game.players, key=lambda p: POSITION_TO_NUM[p.position])
-        
+    def effect(game, player, card):
         # Get the player in the last position
-        last_player = sorted_players[0]
-        last_player_num = POSITION_TO_NUM[last_player.position]
+        last_player = game.get_last_place()
+        last_player_num = game.geometry.tile(last_player.position)
         print(f"{last_player.name} is currently in last position at {last_player.position}.")
 
-        # Find the next player ahead of the last player
-        players_ahead = [p for p in sorted_players if POSITION_TO_NUM[p.position] > last_player_num]
+        # Find the closest player ahead of the last player
+        next_player = game.get_next_ahead(last_player_num)
 
-        if players_ahead:
-            # Find the closest player ahead
-            next_player = players_ahead[0]
-            next_player_num = POSITION_TO_NUM[next_player.position]
+        if next_player is not None:
+            next_player_num = game.geometry.tile(next_player.position)
             print(f"{next_player.name} is the next player ahead at position {next_player.position}.")
 
             # Calculate how many spaces to move the last player
@@ -157,63 +209,294 @@ class HelpingHandCard(Card):
                 print(f"{last_player.name} cannot move behind {next_player.name}, as they are too close.")
         else:
             print(f"No players are ahead of {last_player.name} to move behind.")
+    return effect
 
-
-class SwapSnakesAndLaddersCard(Card):
+def _swap_snakes_and_ladders() -> Callable:
     """
-    Replaces all snakes with ladders and all ladders with snakes.
-    Players previously on a snake tail or a ladder will move foward one space.
+    Snakes and ladders swap, then players on a snake's head or a ladder's bottom move 1 space forward.
     """
-    def __init__(self):
-        super().__init__("Swap Snakes and Ladders", "Swap all snakes and ladders on the board. Players on a snake's head or ladder's tail will be moved 1 space forward.", 10)
-
-    def apply(self, game, player):
+    def effect(game, player, card):
         print("Swapping all snakes and ladders on the board.")
-        
-        # Swap all snakes and ladders
-        self._swap_snakes_and_ladders(game)
-        
-        # Move players to avoid landing on snake heads or ladder tails
-        self._adjust_player_positions(game)
-
-    def _swap_snakes_and_ladders(self, game):
-        """Swap the heads and tails of snakes with the bottoms and tops of ladders."""
-        for i in range(min(len(game.snakes), len(game.ladders))):
-            # Swap snake head with ladder top
-            game.snakes[i].head, game.ladders[i].top = game.ladders[i].top, game.snakes[i].head
-            # Swap snake tail with ladder bot
-            game.snakes[i].tail, game.ladders[i].bottom = game.ladders[i].bottom, game.snakes[i].tail
+
+        snakes, ladders = list(game.snakes), list(game.ladders)
+        # Snakes and ladders are immutable, so each swapped pair is replaced with new ones of the same types
+        for i in range(min(len(snakes), len(ladders))):
+            snake, ladder = snakes[i], ladders[i]
+            # Snake head and ladder top swap, as do snake tail and ladder bottom
+            snakes[i] = type(snake)(ladder.top, ladder.bottom, snake.id)
+            ladders[i] = type(ladder)(snake.tail, snake.head, ladder.id)
+        # Assigning the lists rebuilds the game's lookups
+        game.snakes, game.ladders = snakes, ladders
         print("Snakes and ladders swapped successfully.")
 
-    def _adjust_player_positions(self, game):
-        """Move players 1 space forward if they land on a snake's head or a ladder's tail."""
+        # Move players to avoid landing on snake heads or ladder tails
         for p in game.players:
             player_position = p.position
-            
-            # Check if player is on a snake's head or ladder's tail
-            snake_on_position = next((s for s in game.snakes if s.head == player_position), None)
-            ladder_on_position = next((l for l in game.ladders if l.bottom == player_position), None)
-            
-            if snake_on_position:
+            if game._get_snake(player_position):
                 print(f"{p.name} is on a snake's head at {player_position}. Moving 1 space forward.")
                 game.move_player(p, 1, minigames_enabled=False)
-            
-            elif ladder_on_position:
+            elif game._get_ladder(player_position):
                 print(f"{p.name} is on a ladder's tail at {player_position}. Moving 1 space forward.")
                 game.move_player(p, 1, minigames_enabled=False)
+    return effect
+
+# Effect primitive names used in CARDS_PATH
+EFFECTS: dict[str, Callable[..., Callable]] = {
+    "roll_dice": _roll_dice,
+    "none": _no_effect,
+    "swap_with_leader": _swap_with_leader,
+    "descend_snake": _descend_snake,
+    "all_forward": _all_forward,
+    "helping_hand": _helping_hand,
+    "swap_snakes_and_ladders": _swap_snakes_and_ladders
+}
+
+class CardDefinition:
+    """
+    One card in CARDS_PATH.
+        card_type: the Card subclass drawn.
+        name, description: shown to players.
+        card_id: identifies the card to the frontend. Roll Dice cards show id + roll for rolls of 1-6.
+        weight: relative probability of drawing the card.
+        effect: name of the effect primitive in EFFECTS, called with params.
+        resolve: how the turn ends once the card is applied, one of RESOLVE_KINDS.
+    """
+    __slots__ = ("card_type", "name", "description", "card_id", "weight", "effect", "params", "resolve")
+
+    def __init__(self, card_type: type[Card], name: str, description: str, card_id: int, weight: float,
+                 effect: str, params: dict, resolve: str) -> None:
+        self.card_type = card_type
+        self.name = name
+        self.description = description
+        self.card_id = card_id
+        self.weight = weight
+        self.effect = effect
+        self.params = params
+        self.resolve = resolve
+
+    def card_ids(self) -> list[int]:
+        """
+        Returns the ids this card can show.
+        """
+        if self.effect == "roll_dice":
+            return [self.card_id + roll for roll in range(1, 7)]
+        return [self.card_id]
+
+def _new_card_type(name: str) -> type[Card]:
+    """
+    Returns a new Card subclass for a card defined without a type, named after the card.
+    """
+    class_name = "".join(word.capitalize() for word in re.findall(r"[A-Za-z0-9]+", name)) + "Card"
+    return type(class_name, (Card,), {"__slots__": ()})
+
+def load_card_definitions(path: str = CARDS_PATH) -> list[CardDefinition]:
+    """
+    Returns the card definitions in the JSON file at path, a list of objects with the keys:
+        type (optional): name of a card type in CARD_TYPES. A new type is made for the card if left out.
+        name, description, id, weight, effect, resolve: see CardDefinition.
+        params (optional): arguments for the effect primitive.
+    Raises ValueError if a definition is invalid.
+    """
+    with open(path) as f:
+        entries = json.load(f)
+    definitions = []
+    for entry in entries:
+        try:
+            card_type = CARD_TYPES[entry["type"]] if "type" in entry else _new_card_type(entry["name"])
+            definition = CardDefinition(card_type, entry["name"], entry["description"], int(entry["id"]),
+                                        float(entry["weight"]), entry["effect"], entry.get("params", {}), entry["resolve"])
+        except KeyError as e:
+            raise ValueError(f"Card definition {entry} is missing or has an unknown {e}") from None
+        if definition.effect not in EFFECTS:
+            raise ValueError(f"Card {definition.name} has unknown effect {definition.effect}")
+        if definition.resolve not in RESOLVE_KINDS:
+            raise ValueError(f"Card {definition.name} has unknown resolve {definition.resolve}")
+        definitions.append(definition)
+    return definitions
+
+class CardTable:
+    """
+    Card definitions compiled into lookups keyed by card id, so drawing and resolving a card never searches.
+        definitions: the definitions, in deck order.
+        by_type: card type -> its definition.
+        effects: card id -> the function applying the card, called as effect(game, player, card).
+        resolve: card id -> how the turn ends once the card is applied, one of RESOLVE_KINDS.
+    Raises ValueError if two cards share a type or an id.
+    """
+
+    def __init__(self, definitions: list[CardDefinition]) -> None:
+        self.definitions = definitions
+        self.by_type: dict[type[Card], CardDefinition] = {}
+        self.effects: dict[int, Callable] = {}
+        self.resolve: dict[int, str] = {}
+        for definition in definitions:
+            if definition.card_type in self.by_type:
+                raise ValueError(f"{definition.card_type.__name__} is defined more than once")
+            self.by_type[definition.card_type] = definition
+            compile_effect = EFFECTS[definition.effect]
+            for card_id in definition.card_ids():
+                if card_id in self.effects:
+                    raise ValueError(f"Card id {card_id} of {definition.name} is already used")
+                if definition.effect == "roll_dice":
+                    self.effects[card_id] = compile_effect(card_id - definition.card_id, **definition.params)
+                else:
+                    self.effects[card_id] = compile_effect(**definition.params)
+                self.resolve[card_id] = definition.resolve
+
+# The cards in play, compiled once when the game is started
+CARD_TABLE = CardTable(load_card_definitions())
+
+# (card type, roll) -> the card shared by every draw of it, see CardManager.make_card
+_SHARED_CARDS: dict[tuple[type[Card], int | None], Card] = {}
+
+def _shared_card(card_type: type[Card], roll: int = None) -> Card:
+    """
+    Returns the shared card of card_type, showing roll if it's a Roll Dice card.
+    """
+    card = _SHARED_CARDS.get((card_type, roll))
+    if card is None:
+        card = card_type(roll)
+        _SHARED_CARDS[(card_type, roll)] = card
+    return card
+
+class CardSampler:
+    """
+    Samples indexes in proportion to weights in constant time, using Vose's alias method.
+    The tables are built once in time linear in the number of weights, so build a new sampler when weights change.
+    Index i is drawn with probability prob[i] / n, and otherwise alias[i] is drawn.
+    """
+    __slots__ = ("prob", "alias")
+
+    def __init__(self, weights: list[float]):
+        total = sum(weights)
+        if not weights or total <= 0 or min(weights) < 0:
+            raise ValueError("Weights must be non-negative with a positive total")
+        n = len(weights)
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] += scaled[s] - 1
+            (small if scaled[l] < 1 else large).append(l)
+        # Whatever is left over has a scaled weight of 1, up to rounding errors, and keeps prob 1
+
+    def sample(self, rng: random.Random) -> int:
+        """
+        Returns a random index, using a single call to rng.random.
+        """
+        u = rng.random() * len(self.prob)
+        i = int(u)
+        return i if u - i < self.prob[i] else self.alias[i]
+
+    def sample_many(self, rng: random.Random, k: int) -> list[int]:
+        """
+        Returns k independent random indexes.
+        """
+        return [self.sample(rng) for _ in range(k)]
 
 class CardManager:
     """
     Handles drawing cards from the deck and storing current cards.
+    Cards are drawn with rng, or the random module if None, so games can be replayed from a seed.
+
+    By default each draw is independent, with probabilities given by weights. If deck_size is set, cards
+    are instead dealt from a shuffled deck of deck_size cards, with copies of each card in proportion
+    to weights, and the deck is shuffled again once every card has been drawn.
+    Assign new lists to deck and weights rather than changing them in place, so the sampler is rebuilt.
     """
-    def __init__(self):
-        self.deck = [RollDiceCard, OversleepCard, SwapWithLeadCard, DiceRollDuelCard, DescendSnakeCard, JumpAheadCard, HelpingHandCard, SwapSnakesAndLaddersCard]
-        self.weights = [0.6, 0.02, 0.05, 0.0, 0.05, 0.05, 0.05, 0.05]
+    def __init__(self, rng: random.Random = None, deck_size: int = None):
+        if deck_size is not None and deck_size < 1:
+            raise ValueError("deck_size must be at least 1")
+        self.rng = rng or random
+        self.deck_size = deck_size
+        # The deck and weights are set in CARDS_PATH
+        self._deck = [definition.card_type for definition in CARD_TABLE.definitions]
+        self.weights = [definition.weight for definition in CARD_TABLE.definitions]
         self.current: Card = None
 
+    @property
+    def deck(self) -> list[type[Card]]:
+        """
+        The types of card that can be drawn.
+        """
+        return self._deck
+
+    @deck.setter
+    def deck(self, deck: list[type[Card]]) -> None:
+        self._deck = deck
+        self._pile = []
+
+    @property
+    def weights(self) -> list[float]:
+        """
+        The relative probability of drawing each card in deck. Assigning new weights rebuilds the sampler.
+        """
+        return self._weights
+
+    @weights.setter
+    def weights(self, weights: list[float]) -> None:
+        self._weights = weights
+        self._sampler = CardSampler(weights)
+        self._pile = []
+
+    def deck_counts(self) -> list[int]:
+        """
+        Returns how many copies of each card in deck are in a deck of deck_size cards.
+        Copies are shared out in proportion to weights, with cards left over after rounding down given to
+        the cards that lost the most, so a card with a small weight may have no copies.
+        """
+        total = sum(self.weights)
+        shares = [w * self.deck_size / total for w in self.weights]
+        counts = [int(share) for share in shares]
+        by_remainder = sorted(range(len(shares)), key=lambda i: counts[i] - shares[i])
+        for i in by_remainder[:self.deck_size - sum(counts)]:
+            counts[i] += 1
+        return counts
+
+    def shuffle(self) -> None:
+        """
+        Discards any cards left in the deck, so the next draw deals from a freshly shuffled one.
+        """
+        self._pile = []
+
+    def draw_type(self) -> type[Card]:
+        """
+        Returns the type of a random card, drawn independently or from the shuffled deck if deck_size is set.
+        """
+        if self.deck_size is None:
+            return self._deck[self._sampler.sample(self.rng)]
+        if not self._pile:
+            self._pile = [card for card, n in zip(self._deck, self.deck_counts()) for _ in range(n)]
+            self.rng.shuffle(self._pile)
+        return self._pile.pop()
+
+    def draw_types(self, k: int) -> list[type[Card]]:
+        """
+        Returns the types of k cards drawn one after another, without creating the cards. Used for simulation.
+        """
+        if self.deck_size is None:
+            return [self._deck[i] for i in self._sampler.sample_many(self.rng, k)]
+        return [self.draw_type() for _ in range(k)]
 
     def draw_card(self) -> Card:
         """
         Returns a random card using self.weights to simulate multiple identical cards increasing probability.
         """
-        return random.choices(self.deck, weights=self.weights, k=1)[0]()
+        return self.make_card(self.draw_type())
+
+    def make_card(self, card_type: type[Card]) -> Card:
+        """
+        Returns a card of card_type, using self.rng for any randomness it needs.
+        Cards with no per-draw state are flyweights shared by every draw, and a Roll Dice card
+        is one of six shared cards, one per dice face. Other cards are created fresh.
+        """
+        if not card_type.SHARED:
+            return card_type()
+        if CARD_TABLE.by_type[card_type].effect == "roll_dice":
+            return _shared_card(card_type, self.rng.randint(1,6))
+        return _shared_card(card_type)
@@ -0,0 +1,198 @@
+"""
+Runs many games of Snakes and Ladders in one process, one per table at the venue.
+
+Each table has its own SnakesAndLadders, hardware and display. Inputs from every table are
+submitted to a GameHost, which applies them on a single scheduler thread and sends each table's
+frames to that table's display. Most updates take well under a millisecond, so running them in
+turn keeps every table responsive.
+
+Playing a minigame blocks until it finishes, so updates to a table with a minigame in progress
+run on a worker thread instead. Only that table waits, and its later inputs are queued until the
+update finishes. As in app.py, inputs received while a minigame is played were read by the
+minigame itself, so they are dropped rather than applied afterwards.
+
+Usage:
+    host = GameHost(workers=4)
+    host.add_table("table-1", game_1, server_output("http://127.0.0.1:8001"))
+    host.add_table("table-2", game_2, server_output("http://127.0.0.1:8002"))
+    host.start()
+    ...
+    # From each table's hardware listeners
+    host.submit("table-1", board_reader_1.get_positions(), btn1, btn2)
+"""
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+from typing import Callable
+
+from . import utils
+from .game import SnakesAndLadders
+
+# One update_game call: (current_board, btn1, btn2, time submitted)
+Input = tuple[list[tuple[int, int]], bool, bool, float]
+
+def server_output(base_url: str) -> utils.FrameSender:
+    """
+    Returns an output that posts frames to the WebSocket server at base_url.
+    Each table's output has its own connection and tracks its own server's backpressure.
+    """
+    return utils.FrameSender(base_url)
+
+def is_slow(game: SnakesAndLadders) -> bool:
+    """
+    Returns True if the next update to game may block, i.e. a minigame is waiting to be played.
+    """
+    return game.minigame is not None
+
+class Table:
+    """
+    A game at one table, with the inputs waiting to be applied to it and its latency statistics.
+    Latency is the time from an input being submitted to its frame being sent.
+    """
+
+    def __init__(self, table_id: str, game: SnakesAndLadders, output: Callable[[str], bool]) -> None:
+        self.id = table_id
+        self.game = game
+        self.output = output
+        # Frames the game and its minigames send themselves go to the table's display too
+        game.send = output
+        game.minigame_manager.send = output
+        self.pending: deque[Input] = deque()
+        # True while an update is running on a worker thread
+        self.busy = False
+        self.updates = 0
+        self.dropped = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+    def update(self, current_board: list[tuple[int, int]], btn1: bool, btn2: bool, submitted: float) -> None:
+        """
+        Applies one input to the game and sends the resulting frame.
+        """
+        self.game.update_game(current_board, btn1, btn2)
+        self.output(self.game.get_json())
+        latency = monotonic() - submitted
+        self.updates += 1
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_latency += latency
+
+    def stats(self) -> dict:
+        """
+        Returns the table's update count, queue length and latency statistics.
+        """
+        return {
+            "updates": self.updates,
+            "pending": len(self.pending),
+            "dropped": self.dropped,
+            "busy": self.busy,
+            "lastLatency": self.last_latency,
+            "meanLatency": self.total_latency / self.updates if self.updates else None,
+            "maxLatency": self.max_latency
+        }
+
+class GameHost:
+    """
+    Multiplexes many tables' games on one scheduler thread, with blocking updates on worker threads.
+    At most one update runs on a table at a time, so games need no locking.
+    workers bounds how many tables can play minigames at once. Further tables wait for a free worker.
+    """
+
+    def __init__(self, workers: int = 4, is_slow: Callable[[SnakesAndLadders], bool] = is_slow) -> None:
+        self.tables: dict[str, Table] = {}
+        self.is_slow = is_slow
+        # ("input", table id, Input), ("done", table id, whether a minigame was played) or ("stop",)
+        self._events: queue.Queue = queue.Queue()
+        self._workers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="table")
+        self._thread: threading.Thread | None = None
+
+    def add_table(self, table_id: str, game: SnakesAndLadders, output: Callable[[str], bool] = utils.send_json) -> Table:
+        """
+        Adds a table playing game, whose frames are sent with output, and sends its first frame.
+        Call before start, or the first frame may race with the scheduler.
+        """
+        if table_id in self.tables:
+            raise ValueError(f"Table {table_id} already exists")
+        table = Table(table_id, game, output)
+        self.tables[table_id] = table
+        output(game.get_json())
+        return table
+
+    def submit(self, table_id: str, current_board: list[tuple[int, int]], btn1: bool, btn2: bool) -> None:
+        """
+        Queues an update_game call for the table. Safe to call from any thread.
+        """
+        self._events.put(("input", table_id, (current_board, btn1, btn2, monotonic())))
+
+    def start(self) -> None:
+        """
+        Starts the scheduler on a background thread.
+        """
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the scheduler once queued inputs have been handled, and waits for running updates to finish.
+        """
+        self._events.put(("stop",))
+        if self._thread is not None:
+            self._thread.join()
+        self._workers.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        """
+        Returns the statistics of every table, keyed by table id.
+        """
+        return {table_id: table.stats() for table_id, table in self.tables.items()}
+
+    def run(self) -> None:
+        """
+        Runs the scheduler until stop is called.
+        """
+        while True:
+            event = self._events.get()
+            if event[0] == "stop":
+                return
+            table = self.tables.get(event[1])
+            if table is None:
+                print(f"Input for unknown table {event[1]}")
+                continue
+            if event[0] == "input":
+                table.pending.append(event[2])
+            else:
+                table.busy = False
+                # Inputs received while a minigame was played were read by the minigame itself
+                if event[2]:
+                    table.dropped += len(table.pending)
+                    table.pending.clear()
+            self._dispatch(table)
+
+    def _dispatch(self, table: Table) -> None:
+        """
+        Applies the table's pending inputs in order, handing any that may block to a worker thread.
+        """
+        while table.pending and not table.busy:
+            args = table.pending.popleft()
+            if self.is_slow(table.game):
+                table.busy = True
+                self._workers.submit(self._update_on_worker, table, args)
+            else:
+                self._update(table, args)
+
+    def _update(self, table: Table, args: Input) -> None:
+        try:
+            table.update(*args)
+        except Exception as e:
+            # One table's error mustn't stop every other table
+            print(f"Error updating table {table.id}: {e!r}")
+
+    def _update_on_worker(self, table: Table, args: Input) -> None:
+        minigame = table.game.minigame
+        status = minigame.status if minigame is not None else None
+        self._update(table, args)
+        played = minigame is not None and minigame.status != status
+        self._events.put(("done", table.id, played))
@@ -0,0 +1,210 @@
+"""
+Append-only journal of a session's inputs, and a replayer that re-runs it through SnakesAndLadders.
+
+All of a game's randomness comes from its seeded rng, so a game is fully determined by its starting
+state, seed, the (current_board, btn1, btn2) inputs given to update_game, and the results of any
+minigames played. Minigames run in real time against the hardware, so only their results are recorded.
+
+A journal is a JSON lines file. Each record has a "type":
+    start: a new game. Holds its seed, the size of its card deck, and a base64 snapshot of its starting state,
+        see SnakesAndLadders.snapshot.
+    input: one call to update_game. Holds the board, both buttons, and a CRC32 checksum of get_json
+        afterwards, or null during a minigame, whose frames can't be reproduced.
+    minigame: the result of a minigame played during the next input.
+
+Replaying runs every input through a new SnakesAndLadders as fast as possible, and checks that
+get_json matches the checksums recorded. Use it to profile and regression-test real sessions offline.
+
+Usage:
+    journal = GameJournal(path)
+    journal.start(game)
+    game.update_game(board, btn1, btn2)
+    journal.record_input(board, btn1, btn2, game)
+
+    result = replay(path)
+
+Or from /product:
+    python -m backend.journal <path>
+"""
+import base64
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import zlib
+
+from . import minigames, utils
+from .game import SnakesAndLadders, SnakesLaddersGameState
+
+# Where app.py writes a journal for each session
+JOURNAL_DIR = os.path.join(os.path.dirname(__file__), "journals")
+
+def session_path(directory: str = JOURNAL_DIR) -> str:
+    """
+    Returns the path of a new journal in directory, named after the current time.
+    """
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, time.strftime("session-%Y%m%d-%H%M%S.jsonl"))
+
+def _checksum(game: SnakesAndLadders) -> int | None:
+    """
+    Returns the CRC32 of game's JSON, or None during a minigame.
+    """
+    if game.state == SnakesLaddersGameState.MINIGAME:
+        return None
+    return zlib.crc32(game.get_json().encode())
+
+class GameJournal:
+    """
+    Appends the inputs of every game played to a journal file.
+    Each record is flushed as it is written, so a crash loses at most the record being written.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "a")
+
+    def _write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, separators=utils.JSON_SEPARATORS) + "\n")
+        self._file.flush()
+
+    def start(self, game: SnakesAndLadders) -> None:
+        """
+        Starts journaling game from its current state, giving it a new seed.
+        """
+        game.reseed()
+        game.journal = self
+        self._write({
+            "type": "start",
+            "rows": game.n_rows,
+            "cols": game.n_cols,
+            "seed": game.seed,
+            "deckSize": game.card_manager.deck_size,
+            "snapshot": base64.b64encode(game.snapshot()).decode()
+        })
+
+    def record_input(self, current_board: list[tuple[int,int]], btn1: bool, btn2: bool, game: SnakesAndLadders) -> None:
+        """
+        Records one call to update_game, after game has been updated.
+        """
+        self._write({"type": "input", "board": current_board, "btn1": btn1, "btn2": btn2, "out": _checksum(game)})
+
+    def record_minigame(self, win: bool) -> None:
+        """
+        Records the result of a minigame.
+        """
+        self._write({"type": "minigame", "win": win})
+
+    def close(self) -> None:
+        """
+        Closes the journal file.
+        """
+        self._file.close()
+
+class ReplayMinigame:
+    """
+    Stands in for a minigame during replay. Playing it gives the next recorded result.
+    """
+
+    def __init__(self, results: list[bool]) -> None:
+        self._results = results
+        self.status = minigames.MinigameStatus.START
+
+    def play(self) -> bool:
+        win = self._results.pop(0) if self._results else False
+        self.status = minigames.MinigameStatus.WIN if win else minigames.MinigameStatus.LOSE
+        return win
+
+    def get_json(self) -> str:
+        return json.dumps({"gamePhase": "minigame", "status": minigames.minigameStatus[self.status.value]},
+                          separators=utils.JSON_SEPARATORS)
+
+class ReplayMinigameManager:
+    """
+    Stands in for MinigameManager during replay, playing back recorded minigame results.
+    """
+
+    def __init__(self) -> None:
+        self.results: list[bool] = []
+        self._minigame: ReplayMinigame | None = None
+
+    def new_minigame(self, player, exclusions, game=None) -> ReplayMinigame:
+        self._minigame = ReplayMinigame(self.results)
+        return self._minigame
+
+    def play(self) -> bool:
+        return self._minigame.play() if self._minigame is not None else False
+
+class ReplayResult:
+    """
+    Outcome of replaying a journal.
+        games: number of games started.
+        inputs: number of inputs replayed.
+        mismatches: indexes of the inputs whose output did not match the journal.
+        seconds: time spent replaying.
+    """
+
+    def __init__(self, games: int, inputs: int, mismatches: list[int], seconds: float) -> None:
+        self.games = games
+        self.inputs = inputs
+        self.mismatches = mismatches
+        self.seconds = seconds
+
+    def summary(self) -> dict:
+        return {
+            "games": self.games,
+            "inputs": self.inputs,
+            "mismatches": len(self.mismatches),
+            "firstMismatch": self.mismatches[0] if self.mismatches else None,
+            "seconds": self.seconds,
+            "inputsPerSecond": self.inputs / self.seconds if self.seconds > 0 else None
+        }
+
+def load_journal(path: str) -> list[dict]:
+    """
+    Returns the records in the journal at path. A partly written last record is ignored.
+    """
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+    return records
+
+def replay(path: str, quiet: bool = True) -> ReplayResult:
+    """
+    Replays the journal at path, checking every output against the one recorded.
+    If quiet, the game's printing is discarded.
+    """
+    records = load_journal(path)
+    game = None
+    games = inputs = 0
+    mismatches = []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+        for record in records:
+            if record["type"] == "start":
+                game = SnakesAndLadders(record["rows"], record["cols"], [], None, lambda: (False, False), True)
+                game.restore(base64.b64decode(record["snapshot"]))
+                game.minigame_manager = ReplayMinigameManager()
+                # Replayed frames are only compared, never sent to the display server
+                game.send = lambda data: True
+                game.card_manager.deck_size = record.get("deckSize")
+                game.reseed(record["seed"])
+                games += 1
+            elif record["type"] == "minigame":
+                game.minigame_manager.results.append(record["win"])
+            elif record["type"] == "input":
+                game.update_game([tuple(pos) for pos in record["board"]], record["btn1"], record["btn2"])
+                if record["out"] is not None and _checksum(game) != record["out"]:
+                    mismatches.append(inputs)
+                inputs += 1
+    return ReplayResult(games, inputs, mismatches, time.perf_counter() - start)
+
+if __name__ == "__main__":
+    for name, value in replay(sys.argv[1]).summary().items():
+        print(f"{name}: {value}")
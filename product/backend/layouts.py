@@ -0,0 +1,143 @@
+"""
+Search for snake and ladder layouts that give games of a target length.
+
+SnakesAndLadders picks its snakes and ladders from the SNAKES and LADDERS pools at random, so some
+games drag on and others end in a few turns. This module searches subsets of the pools for layouts
+whose expected length is close to a target and whose variance is small, scoring each candidate
+exactly with analysis. Scores are cached, so a layout revisited during the search is never analysed twice.
+
+The chosen layouts are written to LAYOUT_POOL_PATH, which SnakesAndLadders reads to start each new
+game on a precomputed layout without doing any analysis itself. Lengths are the number of turns
+one player takes to finish, as in analysis.
+
+Usage:
+    layouts = optimize(target_turns=45, max_variance=400)
+    save_pool(layouts)
+
+Or from /product:
+    python -m backend.layouts [target_turns] [max_variance] [n_layouts]
+"""
+import json
+import random
+import sys
+
+from .analysis import analyze
+from .game import SNAKES, LADDERS, LAYOUT_POOL_PATH
+
+Entity = tuple[tuple[int, int], tuple[int, int]]
+Layout = tuple[tuple[Entity, ...], tuple[Entity, ...]]
+
+class LayoutScorer:
+    """
+    Scores layouts against a target length, caching the analysis of every layout scored.
+    A layout's score is how many turns its expected length is from target_turns, plus how many
+    turns its standard deviation is above that allowed by max_variance. Lower is better.
+    """
+
+    def __init__(self, target_turns: float, max_variance: float, weights: list[float] = None,
+                 minigame_win_prob: float = 0.5) -> None:
+        self.target_turns = target_turns
+        self.max_std = max_variance ** 0.5
+        self.weights = weights
+        self.minigame_win_prob = minigame_win_prob
+        # Layout -> (expected turns, variance)
+        self.cache: dict[Layout, tuple[float, float]] = {}
+
+    def stats(self, layout: Layout) -> tuple[float, float]:
+        """
+        Returns the expected turns and variance of layout.
+        """
+        if layout not in self.cache:
+            snakes, ladders = layout
+            analysis = analyze(list(snakes), list(ladders), self.weights, self.minigame_win_prob)
+            self.cache[layout] = (analysis.expected_turns, analysis.variance)
+        return self.cache[layout]
+
+    def score(self, layout: Layout) -> float:
+        """
+        Returns the score of layout. Layouts that never finish score infinity.
+        """
+        try:
+            expected_turns, variance = self.stats(layout)
+        except ValueError:
+            # Snakes and ladders lead into each other in a loop
+            return float("inf")
+        return abs(expected_turns - self.target_turns) + max(0.0, variance ** 0.5 - self.max_std)
+
+def _neighbour(layout: Layout, snakes: list[Entity], ladders: list[Entity], rng: random.Random) -> Layout:
+    """
+    Returns a copy of layout with one snake or ladder replaced by an unused one from the pools,
+    or with two snakes or two ladders swapping places, which changes how they pair up when swapped.
+    """
+    chosen = [list(layout[0]), list(layout[1])]
+    kind = rng.randrange(2)
+    entities, pool = chosen[kind], (snakes, ladders)[kind]
+    unused = [entity for entity in pool if entity not in entities]
+    if entities and (not unused or rng.random() < 0.25):
+        i, j = rng.randrange(len(entities)), rng.randrange(len(entities))
+        entities[i], entities[j] = entities[j], entities[i]
+    elif entities:
+        entities[rng.randrange(len(entities))] = rng.choice(unused)
+    return (tuple(chosen[0]), tuple(chosen[1]))
+
+def optimize(target_turns: float,
+             max_variance: float,
+             n_layouts: int = 50,
+             snakes: list[Entity] = SNAKES,
+             ladders: list[Entity] = LADDERS,
+             num_snakes: int = 7,
+             num_ladders: int = 7,
+             weights: list[float] = None,
+             minigame_win_prob: float = 0.5,
+             tolerance: float = 1.0,
+             max_steps: int = 200,
+             max_restarts: int = 500,
+             seed: int = None) -> list[Layout]:
+    """
+    Returns up to n_layouts distinct layouts of num_snakes snakes and num_ladders ladders whose score
+    is within tolerance turns, best first. See LayoutScorer for how layouts are scored.
+    Each search starts from a random layout, as SnakesAndLadders would pick, and repeatedly moves to a
+    better neighbouring layout. It gives up after max_steps steps without improving, and the whole
+    search gives up after max_restarts starts, so fewer layouts may be returned if the target is unreachable.
+    """
+    num_snakes = min(num_snakes, len(snakes)) if num_snakes >= 0 else len(snakes)
+    num_ladders = min(num_ladders, len(ladders)) if num_ladders >= 0 else len(ladders)
+    scorer = LayoutScorer(target_turns, max_variance, weights, minigame_win_prob)
+    rng = random.Random(seed)
+
+    found: set[Layout] = set()
+    for _ in range(max_restarts):
+        if len(found) >= n_layouts:
+            break
+        layout = (tuple(rng.sample(snakes, k=num_snakes)), tuple(rng.sample(ladders, k=num_ladders)))
+        score = scorer.score(layout)
+        steps = 0
+        while score > tolerance and steps < max_steps:
+            candidate = _neighbour(layout, snakes, ladders, rng)
+            candidate_score = scorer.score(candidate)
+            steps += 1
+            if candidate_score < score:
+                layout, score, steps = candidate, candidate_score, 0
+        if score <= tolerance:
+            found.add(layout)
+
+    return sorted(found, key=scorer.score)[:n_layouts]
+
+def save_pool(layouts: list[Layout], path: str = LAYOUT_POOL_PATH) -> None:
+    """
+    Writes layouts to path in the format read by SnakesAndLadders.
+    """
+    pool = [{"snakes": [list(map(list, entity)) for entity in snakes],
+             "ladders": [list(map(list, entity)) for entity in ladders]}
+            for snakes, ladders in layouts]
+    # One layout per line
+    with open(path, "w") as f:
+        f.write("[\n" + ",\n".join(json.dumps(layout) for layout in pool) + "\n]\n")
+
+if __name__ == "__main__":
+    target_turns = float(sys.argv[1]) if len(sys.argv) > 1 else 45
+    max_variance = float(sys.argv[2]) if len(sys.argv) > 2 else 400
+    n_layouts = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    layouts = optimize(target_turns, max_variance, n_layouts)
+    save_pool(layouts)
+    print(f"Saved {len(layouts)} layouts to {LAYOUT_POOL_PATH}")
@@ -0,0 +1,186 @@
+"""
+Minimal metrics collection for the server, rendered in the Prometheus text exposition format.
+
+Only the metric types the server needs are implemented, so no extra packages are required
+on the Raspberry Pi.
+
+Usage:
+    registry = Registry()
+    frames = registry.add(Counter("frames_total", "Frames received."))
+    frames.inc()
+    text = registry.render()
+"""
+from bisect import bisect_left
+from collections import deque
+from time import monotonic
+from typing import Callable
+
+# Default histogram bucket upper bounds in seconds, from 0.1ms to 1s
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+def _format_labels(labels: dict[str, str]) -> str:
+    """
+    Returns labels formatted as {name="value",...}, or an empty string if there are none.
+    """
+    if not labels:
+        return ""
+    pairs = ",".join(f'{k}="{str(v)}"' for k, v in labels.items())
+    return "{" + pairs + "}"
+
+class Metric:
+    """
+    Abstract metric. Stores the name, help text and type shared by all metrics.
+    """
+    TYPE = "untyped"
+
+    def __init__(self, name: str, description: str) -> None:
+        self.name = name
+        self.description = description
+
+    def samples(self) -> list[tuple[str, dict[str, str], float]]:
+        """
+        Returns a list of (sample name, labels, value) for the metric's current state.
+        """
+        return []
+
+    def render(self) -> str:
+        """
+        Returns the metric in the Prometheus text format.
+        """
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.TYPE}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines)
+
+class Counter(Metric):
+    """
+    A value that only ever increases. e.g. number of frames received.
+    """
+    TYPE = "counter"
+
+    def __init__(self, name: str, description: str) -> None:
+        super().__init__(name, description)
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        """
+        Increases the counter by amount.
+        """
+        self.value += amount
+
+    def samples(self):
+        return [(self.name, {}, self.value)]
+
+class Gauge(Metric):
+    """
+    A value that can go up or down. e.g. number of connected clients.
+    If func is given, it is called to get the value each time the metric is rendered.
+    func may return a single value, or a dict from label values to values when label is set.
+    """
+    TYPE = "gauge"
+
+    def __init__(self, name: str, description: str, func: Callable = None, label: str = None) -> None:
+        super().__init__(name, description)
+        self.value = 0
+        self._func = func
+        self._label = label
+
+    def set(self, value: float) -> None:
+        """
+        Sets the gauge to value.
+        """
+        self.value = value
+
+    def samples(self):
+        if self._func is None:
+            return [(self.name, {}, self.value)]
+        value = self._func()
+        if self._label is None:
+            return [(self.name, {}, value)]
+        return [(self.name, {self._label: k}, v) for k, v in value.items()]
+
+class Histogram(Metric):
+    """
+    Counts observations into cumulative buckets. Used for latencies.
+    """
+    TYPE = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, description)
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # last count is for +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Records a single observation.
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        samples = []
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            samples.append((self.name + "_bucket", {"le": bound}, total))
+        samples.append((self.name + "_bucket", {"le": "+Inf"}, self.count))
+        samples.append((self.name + "_sum", {}, self.sum))
+        samples.append((self.name + "_count", {}, self.count))
+        return samples
+
+class Rate(Gauge):
+    """
+    Gauge reporting how many events were marked per second, averaged over the last window seconds.
+    """
+
+    def __init__(self, name: str, description: str, window: int = 10) -> None:
+        super().__init__(name, description)
+        self.window = window
+        # (second, count) pairs for the seconds in the window that had events
+        self._seconds: deque[list[int]] = deque()
+
+    def mark(self, amount: int = 1) -> None:
+        """
+        Records amount events as happening now.
+        """
+        now = int(monotonic())
+        if self._seconds and self._seconds[-1][0] == now:
+            self._seconds[-1][1] += amount
+        else:
+            self._seconds.append([now, amount])
+        self._expire(now)
+
+    def _expire(self, now: int) -> None:
+        """
+        Removes seconds that have fallen out of the window.
+        """
+        while self._seconds and self._seconds[0][0] <= now - self.window:
+            self._seconds.popleft()
+
+    def samples(self):
+        self._expire(int(monotonic()))
+        return [(self.name, {}, sum(count for _, count in self._seconds) / self.window)]
+
+class Registry:
+    """
+    Collection of metrics that are rendered together.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: list[Metric] = []
+
+    def add(self, metric: Metric) -> Metric:
+        """
+        Registers metric and returns it.
+        """
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Returns all metrics in the Prometheus text format.
+        """
+        return "\n".join(m.render() for m in self.metrics) + "\n"
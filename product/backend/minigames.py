@@ -4,11 +4,15 @@ from abc import ABC, abstractmethod
 from enum import Enum
 
 from random import randrange, choice
-from time import sleep
 import json
 from . import utils
+from .ticker import Ticker, FramePublisher
 
-from pynput import keyboard
+# pynput needs a display to import. Headless tools, such as the simulator, don't use the keyboard
+try:
+    from pynput import keyboard
+except ImportError:
+    keyboard = None
 
 # Represents status of a minigame
 class MinigameStatus(Enum):
@@ -35,8 +39,8 @@ class Minigame(ABC):
     """
     Controls the logic and gameplay of a minigame
     """
-    TICK = 0.1
-    DURATION = 100 # ticks
+    TICK = 0.1 # seconds
+    DURATION = 100 # ticks, each TICK seconds long
 
     def __init__(self, 
                  player: "Player", 
@@ -64,6 +68,12 @@ class Minigame(ABC):
         self._timer = self.DURATION
         self.status = MinigameStatus.START
         self.phase = "minigame"
+        # Sends frames to the display. Set by MinigameManager
+        self.send: Callable[[str], bool] = utils.send_json
+        # Sends frames without blocking the loop while play runs. Set by MinigameManager, or None to send directly
+        self.publisher: FramePublisher | None = None
+        # Keeps the loop to one tick every TICK seconds
+        self.ticker = Ticker(self.TICK)
 
     @abstractmethod
     def play(self) -> bool:
@@ -86,9 +96,24 @@ class Minigame(ABC):
         return data
 
     def get_json(self) -> str:
-        """Transforms minigame data into JSON."""
-        return json.dumps(self.get_board_data(), indent=4)
+        """Transforms minigame data into minified JSON."""
+        return json.dumps(self.get_board_data(), separators=utils.JSON_SEPARATORS)
     
+    def publish_frame(self) -> None:
+        """Sends the current frame to the display, unless the server is falling behind."""
+        # Outputs that track their server's backpressure, e.g. a utils.FrameSender, say when a frame is due
+        frame_due = utils.frame_due if self.send is utils.send_json else getattr(self.send, "frame_due", None)
+        if frame_due is not None and not frame_due():
+            return
+        if self.publisher is not None:
+            self.publisher.publish(self.get_json())
+        else:
+            self.send(self.get_json())
+
+    def get_timings(self) -> dict:
+        """Returns the tick statistics of the gameplay loop."""
+        return self.ticker.stats()
+
     def is_timeup(self) -> bool:
         """Returns true if the internal minigame timer reached 0 else false."""
         return self._timer <= 0
@@ -270,14 +295,14 @@ class GooseChase(Minigame):
         self.reset_on_changes()
 
         self.status = MinigameStatus.PLAY
+        self.ticker.start()
 
         while not self.is_timeup():
 
             self.update_state(self.update_geese)
             
-            utils.send_json(self.get_json())
-
-            sleep(self.TICK)
+            self.publish_frame()
+            self.ticker.wait()
             
             if self.debug:
                 # check for caught geese
@@ -353,6 +378,7 @@ class FallingFruits(Minigame):
 
     def play(self) -> bool:
         self.status = MinigameStatus.PLAY
+        self.ticker.start()
         SPAWN_GAP = 10
         spawn_timer = SPAWN_GAP  #ticks
         FALL_GAP = 3
@@ -377,8 +403,8 @@ class FallingFruits(Minigame):
                 self.fruits.append(self.Fruit((0, randrange(0, 10))))
                 spawn_timer = SPAWN_GAP
             
-            utils.send_json(self.get_json())
-            sleep(self.TICK)
+            self.publish_frame()
+            self.ticker.wait()
 
             # check for caught fruits and losing conitions
             for fruit in self.fruits:
@@ -519,6 +545,7 @@ class PestControl(Minigame):
 
     def play(self) -> bool:
         self.status = MinigameStatus.PLAY
+        self.ticker.start()
         self._pest = self.Pest()
 
         # Reset button pressed flags
@@ -538,8 +565,8 @@ class PestControl(Minigame):
                     return False
 
             self._pest.move()
-            utils.send_json(self.get_json())
-            sleep(self.TICK)
+            self.publish_frame()
+            self.ticker.wait()
             
             ## check if pest caught
             #btn1, btn2 = self.get_buttons_pressed()
@@ -628,6 +655,8 @@ class MinigameManager():
         self._get_btns_pressed = get_btns_pressed
         self._minigame: Minigame = None
         self.debug: bool = debug
+        # Sends frames to the display. Replace to route a table's frames elsewhere
+        self.send: Callable[[str], bool] = utils.send_json
 
     def new_minigame(self, player: "Player", exclusions: list["Player"], game: Minigame = None) -> Minigame:
         """
@@ -639,6 +668,7 @@ class MinigameManager():
             game = MINIGAMES[randrange(0, len(MINIGAMES))]
             
         self._minigame = game(player, PosPtr(player), exclusions, self._get_board_state, self._board_reader, self._get_btns_pressed, self.debug)
+        self._minigame.send = self.send
 
         return self._minigame
 
@@ -650,8 +680,20 @@ class MinigameManager():
         if self._minigame is None:
             return False
 
-        win = self._minigame.play()
-        utils.send_json(self._minigame.get_json())
+        # Frames sent during play are sent on a background thread, so sending doesn't delay the ticks
+        publisher = FramePublisher(self.send)
+        self._minigame.publisher = publisher
+        try:
+            win = self._minigame.play()
+        finally:
+            self._minigame.publisher = None
+            publisher.close()
+        self.send(self._minigame.get_json())
+
+        ticks = self._minigame.get_timings()
+        if ticks["overruns"]:
+            print(f"{self._minigame.phase}: {ticks['overruns']} of {ticks['ticks']} ticks overran "
+                  f"by up to {ticks['maxLateness'] * 1000:.1f} ms, {ticks['skipped']} skipped")
         return win
     
     def get_status(self) -> MinigameStatus:
@@ -0,0 +1,105 @@
+"""
+Precomputed outcomes of moving a piece on one Snakes and Ladders layout.
+
+Where a move ends depends on the layout and on which tiles other players occupy. Occupied tiles are
+rare, so MoveTable works out moves assuming no other players are in the way, and records the tiles the
+piece stops on. SnakesAndLadders.move_player uses the table when none of those tiles are occupied,
+which makes a move a lookup, and otherwise resolves it one step at a time.
+
+Where following snakes and ladders from each tile leads is worked out when the table is built. Each
+move is then worked out the first time it is asked for and kept, as a layout only sees a few dozen
+moves before it changes. Moves past the last square are included, as in BoardGeometry. The table is
+built for one layout, so it must be rebuilt whenever the snakes or ladders change.
+
+Usage:
+    table = MoveTable(geometry, {tile: (entity, destination tile), ...})
+    move = table.get(tile, roll)
+    move.end, move.trigger, move.path
+"""
+from typing import Any
+
+from .board_geometry import BoardGeometry
+
+# Longest move kept in the table. Longer moves are worked out when asked for
+MAX_TABLE_SPACES = 6
+
+class Move:
+    """
+    The outcome of moving a piece from one tile by a number of spaces, with no other players in the way.
+        path: positions passed through, as collected in Player.intermediate_positions.
+        landing: position reached by moving the spaces.
+        trigger: the snake or ladder at landing, which starts a minigame when minigames are enabled, or None.
+        end: position finally reached with minigames disabled, after following any snakes and ladders.
+            None if snakes and ladders lead into each other in a loop, so the move never ends.
+        stops: positions stopped on with minigames disabled, from landing to end. The move is only
+            valid if no other player is on any of them. With minigames enabled, only landing matters.
+    """
+    __slots__ = ("path", "landing", "trigger", "end", "stops")
+
+    def __init__(self, path: list[tuple[int, int]], landing: tuple[int, int], trigger: Any,
+                 end: tuple[int, int] | None, stops: tuple[tuple[int, int], ...]) -> None:
+        self.path = path
+        self.landing = landing
+        self.trigger = trigger
+        self.end = end
+        self.stops = stops
+
+class MoveTable:
+    """
+    The moves of 0 to MAX_TABLE_SPACES spaces from the start tile and each square on one layout.
+    entities maps the tile of each snake head and ladder bottom to (the snake or ladder, the tile it leads to).
+    """
+
+    def __init__(self, geometry: BoardGeometry, entities: dict[int, tuple[Any, int]]) -> None:
+        self.geometry = geometry
+        self.entities = entities
+        # Tile -> (end tile or None, tiles stopped on) after following snakes and ladders from it
+        self._settled = [self._settle(tile) for tile in range(geometry.n_tiles + MAX_TABLE_SPACES + 1)]
+        # moves[tile][spaces], or None until first asked for
+        self.moves: list[list[Move | None]] = [[None] * (MAX_TABLE_SPACES + 1) for _ in range(geometry.n_tiles + 1)]
+
+    def _settle(self, tile: int) -> tuple[int | None, tuple[int, ...]]:
+        """
+        Returns the tile reached from tile by following snakes and ladders, and every tile stopped on.
+        The end tile is None if they lead into each other in a loop.
+        """
+        stops = [tile]
+        seen = {tile}
+        while tile in self.entities:
+            tile = self.entities[tile][1]
+            if tile in seen:
+                return None, tuple(stops)
+            seen.add(tile)
+            stops.append(tile)
+        return tile, tuple(stops)
+
+    def _move(self, tile: int, spaces: int) -> Move:
+        """
+        Works out the move of spaces spaces from tile.
+        """
+        landing = tile + spaces
+        if landing < len(self._settled):
+            end, stops = self._settled[landing]
+        else:
+            end, stops = self._settle(landing)
+        entity = self.entities.get(landing)
+        position = self.geometry.position
+        return Move(
+            self.geometry.path(tile, landing),
+            position(landing),
+            entity[0] if entity is not None else None,
+            position(end) if end is not None else None,
+            tuple(position(t) for t in stops)
+        )
+
+    def get(self, tile: int, spaces: int) -> Move:
+        """
+        Returns the move of spaces spaces from tile. Negative spaces don't move the piece.
+        """
+        spaces = max(spaces, 0)
+        if not (0 <= tile < len(self.moves) and spaces <= MAX_TABLE_SPACES):
+            return self._move(tile, spaces)
+        move = self.moves[tile][spaces]
+        if move is None:
+            move = self.moves[tile][spaces] = self._move(tile, spaces)
+        return move
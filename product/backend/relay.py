@@ -0,0 +1,195 @@
+"""
+Local relay used to share ingested frames between several server workers.
+
+When uvicorn is started with more than one worker, each worker process only knows
+about the websocket clients connected to it. The relay lets every worker publish a
+frame once and have it delivered to all workers, which then broadcast to their own clients.
+
+The first worker to grab the lock file hosts the relay on a Unix domain socket. All other
+workers connect to it as subscribers. If the hosting worker exits, the lock is released and
+one of the remaining workers takes over.
+
+Frames are sent as a 4 byte big-endian length followed by the raw frame bytes.
+"""
+import asyncio
+import os
+import struct
+from typing import Awaitable, Callable
+
+# File locking and Unix sockets are not available on Windows, where only a single worker can be run
+try:
+    import fcntl
+except ModuleNotFoundError:
+    fcntl = None
+
+HEADER = struct.Struct("!I")
+RECONNECT_DELAY = 0.5 # seconds
+# Longest the host waits for a subscribed worker to take a frame before dropping it. The worker then reconnects
+SUBSCRIBER_TIMEOUT = 1.0 # seconds
+
+class Relay:
+    """
+    Distributes frames published by any worker to every worker on the host.
+
+    Usage:
+        relay = Relay("/tmp/tebs_relay.sock", broadcast)
+        await relay.start()
+        await relay.publish(b"...")
+        await relay.stop()
+    """
+
+    def __init__(self, path: str, on_frame: Callable[[bytes], Awaitable[None]]) -> None:
+        if fcntl is None:
+            raise RuntimeError("The relay requires Unix domain sockets and is not supported on this platform")
+        self.path = path
+        self._on_frame = on_frame
+        self._lock_file = None
+        self._server: asyncio.AbstractServer | None = None
+        self._subscribers: list[asyncio.StreamWriter] = []
+        self._writer: asyncio.StreamWriter | None = None
+        self._task: asyncio.Task | None = None
+        # Set once this worker is hosting or subscribed
+        self._ready = asyncio.Event()
+
+    @property
+    def is_host(self) -> bool:
+        """
+        True if this worker is currently hosting the relay.
+        """
+        return self._server is not None
+
+    async def start(self) -> None:
+        """
+        Joins the relay, hosting it if no other worker currently is.
+        Raises the error if joining fails, e.g. OSError if the socket can't be created at path.
+        """
+        self._task = asyncio.create_task(self._run())
+        # Wait until this worker is either hosting or subscribed, or joining fails
+        ready = asyncio.create_task(self._ready.wait())
+        await asyncio.wait((self._task, ready), return_when=asyncio.FIRST_COMPLETED)
+        if not self._ready.is_set():
+            ready.cancel()
+            self._task.result()
+
+    async def stop(self) -> None:
+        """
+        Leaves the relay and releases the host lock if held.
+        """
+        if self._task is not None:
+            self._task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._server is not None:
+            self._server.close()
+            for writer in self._subscribers:
+                writer.close()
+            self._subscribers = []
+            self._server = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    async def publish(self, frame: bytes) -> None:
+        """
+        Sends frame to every worker, including this one.
+        Frames published by one worker are delivered to all workers in the same order.
+        """
+        if self.is_host:
+            await self._fan_out(frame)
+        elif self._writer is not None:
+            self._writer.write(HEADER.pack(len(frame)) + frame)
+            await self._writer.drain()
+        else:
+            # Between hosts. Deliver locally so this worker's clients don't miss the frame
+            await self._on_frame(frame)
+
+    def _try_lock(self) -> bool:
+        """
+        Attempts to take the host lock without blocking. Returns True if it was taken.
+        """
+        lock_file = open(self.path + ".lock", "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    async def _run(self) -> None:
+        """
+        Hosts or subscribes to the relay, taking over as host if the current host goes away.
+        """
+        while True:
+            if self._try_lock():
+                # Any socket left at path belongs to a host that has exited
+                if os.path.exists(self.path):
+                    os.unlink(self.path)
+                self._server = await asyncio.start_unix_server(self._handle_subscriber, self.path)
+                print("Relay hosted at", self.path)
+                self._ready.set()
+                return
+
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                # Host has the lock but isn't listening yet
+                await asyncio.sleep(RECONNECT_DELAY / 10)
+                continue
+            self._ready.set()
+
+            await self._read_frames(reader, self._on_frame)
+            self._writer = None
+            print("Relay host disconnected")
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _handle_subscriber(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serves a single subscribed worker. Every frame it sends is fanned out to all workers.
+        """
+        self._subscribers.append(writer)
+        await self._read_frames(reader, self._fan_out)
+        if writer in self._subscribers:
+            self._subscribers.remove(writer)
+        writer.close()
+
+    async def _fan_out(self, frame: bytes) -> None:
+        """
+        Delivers frame to all subscribed workers, then to this worker's own clients.
+        """
+        packet = HEADER.pack(len(frame)) + frame
+        if self._subscribers:
+            await asyncio.gather(*(self._send(writer, packet) for writer in self._subscribers[:]))
+        await self._on_frame(frame)
+
+    async def _send(self, writer: asyncio.StreamWriter, packet: bytes) -> None:
+        """
+        Sends packet to a subscribed worker, waiting for it to be taken so frames can't build up without limit.
+        A worker that doesn't take it within SUBSCRIBER_TIMEOUT is dropped.
+        """
+        try:
+            writer.write(packet)
+            await asyncio.wait_for(writer.drain(), SUBSCRIBER_TIMEOUT)
+        except asyncio.TimeoutError:
+            print("Relay subscriber stalled, disconnecting it")
+            writer.close()
+        except (ConnectionError, RuntimeError):
+            pass
+        else:
+            return
+        if writer in self._subscribers:
+            self._subscribers.remove(writer)
+
+    async def _read_frames(self, reader: asyncio.StreamReader, handler: Callable[[bytes], Awaitable[None]]) -> None:
+        """
+        Reads length-prefixed frames from reader until the connection closes, passing each to handler.
+        """
+        try:
+            while True:
+                (size,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+                await handler(await reader.readexactly(size))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
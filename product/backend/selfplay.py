@@ -0,0 +1,247 @@
+"""
+Bot players and a self-play mode for soak testing the SnakesAndLadders state machine.
+
+Bots play every player at a table. They read the game's JSON, as the frontend does, and respond with
+the board and button presses a real table would produce: placing pieces on setup squares, drawing
+cards, moving pieces where the display shows them and confirming minigames and the end of the game.
+With mistake_prob they sometimes misplace a piece, so the incorrect-square state is exercised too.
+
+Self-play runs complete games back to back through update_game without any real-time sleeps.
+Minigames are stood in for by ones that finish instantly with a random result. Frames the games send
+are counted and discarded rather than sent to the display server, so self-play can run beside a live
+table. A game that doesn't finish within max_updates inputs, or raises an exception, is reported and replaced by a fresh game.
+Each game and its bots are seeded from one seed, which is reported with any stuck game so it can be reproduced.
+
+Usage:
+    result = self_play(1000, n_players=4)
+    print(result.summary())
+
+Or from /product:
+    python -m backend.selfplay [n_games] [n_players]
+"""
+import contextlib
+import io
+import json
+import random
+import sys
+import time
+import traceback
+from collections import Counter
+from typing import Callable
+
+from . import minigames, utils
+from .game import SnakesAndLadders, SnakesLaddersGameState, SETUP_POSITIONS
+
+class BotMinigame:
+    """
+    A minigame that finishes as soon as it is played, won with win_prob.
+    """
+
+    def __init__(self, get_board_state: Callable, win_prob: float, rng: random.Random) -> None:
+        self._get_board_state = get_board_state
+        self._win_prob = win_prob
+        self._rng = rng
+        self.status = minigames.MinigameStatus.START
+
+    def play(self) -> bool:
+        win = self._rng.random() < self._win_prob
+        self.status = minigames.MinigameStatus.WIN if win else minigames.MinigameStatus.LOSE
+        return win
+
+    def get_json(self) -> str:
+        data = self._get_board_state()
+        data["gamePhase"] = "minigame-bot"
+        data["minigameData"] = {"status": minigames.minigameStatus[self.status.value]}
+        return json.dumps(data, separators=utils.JSON_SEPARATORS)
+
+class BotMinigameManager:
+    """
+    Stands in for MinigameManager, starting BotMinigames.
+    """
+
+    def __init__(self, get_board_state: Callable, win_prob: float, rng: random.Random) -> None:
+        self._get_board_state = get_board_state
+        self._win_prob = win_prob
+        self._rng = rng
+        self._minigame: BotMinigame | None = None
+
+    def new_minigame(self, player, exclusions, game=None) -> BotMinigame:
+        self._minigame = BotMinigame(self._get_board_state, self._win_prob, self._rng)
+        return self._minigame
+
+    def play(self) -> bool:
+        return self._minigame.play() if self._minigame is not None else False
+
+class DiscardedFrames:
+    """
+    Output for bot games, which counts their frames rather than sending them to a real table's display.
+    """
+
+    def __init__(self) -> None:
+        self.frames = 0
+
+    def __call__(self, data: str) -> bool:
+        self.frames += 1
+        return True
+
+class Bots:
+    """
+    Plays n_players players at one table, deciding each input from the game's JSON.
+    """
+
+    def __init__(self, n_players: int, rng: random.Random, mistake_prob: float = 0.05) -> None:
+        self.n_players = min(n_players, len(SETUP_POSITIONS))
+        self.rng = rng
+        self.mistake_prob = mistake_prob
+
+    def next_input(self, state: dict) -> tuple[list[tuple[int, int]], bool, bool]:
+        """
+        Returns the (current_board, btn1, btn2) the players would give in response to state.
+        """
+        phase = state["gamePhase"]
+        board = [tuple(p["position"]) for p in state["players"] if p["position"] is not None]
+
+        if phase == "setup":
+            if len(state["players"]) < self.n_players:
+                # Place the next player's piece on a free colour's setup square
+                used = {tuple(p["position"]) for p in state["players"] if p["position"] is not None}
+                free = [squares for squares in SETUP_POSITIONS if not used.intersection(squares)]
+                return board + [self.rng.choice(self.rng.choice(free))], True, False
+            return board, False, True
+
+        if phase == "gameplay":
+            if self.rng.random() < self.mistake_prob and board:
+                return self._misplace(board), False, False
+            btn1 = self.rng.random() < 0.5
+            return board, btn1, not btn1
+
+        if phase.startswith("minigame"):
+            return board, True, False
+
+        if phase == "gameover":
+            return board, False, True
+
+        # drawcard and incorrect-square: put every piece where the display shows it
+        if phase == "drawcard" and self.rng.random() < self.mistake_prob and board:
+            return self._misplace(board), True, False
+        return board, False, False
+
+    def _misplace(self, board: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """
+        Returns board with one piece moved to a random empty square.
+        """
+        board = list(board)
+        empty = [(r, c) for r in range(10) for c in range(10) if (r, c) not in board]
+        board[self.rng.randrange(len(board))] = self.rng.choice(empty)
+        return board
+
+class SelfPlayResult:
+    """
+    Outcome of a self-play run.
+        games: number of games played to game over.
+        updates: number of update_game calls.
+        seconds: time spent playing.
+        phases: number of inputs given in each game phase.
+        stuck: (seed, phase, updates) of games that didn't finish within max_updates.
+        errors: (seed, phase, traceback) of games that raised an exception.
+        unexpected_transitions: number of each state transition not in game.TRANSITIONS.
+        frames_discarded: number of frames the games sent, which were discarded.
+    """
+
+    def __init__(self, games: int, updates: int, seconds: float, phases: Counter,
+                 stuck: list[tuple[int, str, int]], errors: list[tuple[int, str, str]],
+                 unexpected_transitions: Counter, frames_discarded: int) -> None:
+        self.games = games
+        self.updates = updates
+        self.seconds = seconds
+        self.phases = phases
+        self.stuck = stuck
+        self.errors = errors
+        self.unexpected_transitions = unexpected_transitions
+        self.frames_discarded = frames_discarded
+
+    def summary(self) -> dict:
+        return {
+            "games": self.games,
+            "updates": self.updates,
+            "seconds": self.seconds,
+            "gamesPerSecond": self.games / self.seconds if self.seconds > 0 else None,
+            "updatesPerSecond": self.updates / self.seconds if self.seconds > 0 else None,
+            "phases": dict(self.phases),
+            "stuck": self.stuck,
+            "errors": [(seed, phase, tb.strip().splitlines()[-1]) for seed, phase, tb in self.errors],
+            "unexpectedTransitions": dict(self.unexpected_transitions),
+            "framesDiscarded": self.frames_discarded
+        }
+
+def _new_game(seed: int, n_players: int, mistake_prob: float, minigame_win_prob: float,
+              output: DiscardedFrames) -> tuple[SnakesAndLadders, Bots]:
+    """
+    Returns a game in setup and the bots that play it, all seeded with seed. The game sends frames to output.
+    """
+    rng = random.Random(seed)
+    game = SnakesAndLadders(10, 10, [], None, lambda: (False, False), True, seed=seed)
+    game.send = output
+    game.minigame_manager = BotMinigameManager(game.get_board_state, minigame_win_prob, rng)
+    return game, Bots(n_players, rng, mistake_prob)
+
+def self_play(n_games: int,
+              n_players: int = 4,
+              seed: int = None,
+              mistake_prob: float = 0.05,
+              minigame_win_prob: float = 0.5,
+              max_updates: int = 20_000,
+              quiet: bool = True) -> SelfPlayResult:
+    """
+    Plays n_games games with n_players bots each, from setup to game over.
+    Games that get stuck or raise an exception count towards n_games. If quiet, the game's printing is discarded.
+    """
+    rng = random.Random(seed)
+    discarded = DiscardedFrames()
+    new_game = lambda seed: _new_game(seed, n_players, mistake_prob, minigame_win_prob, discarded)
+    phases = Counter()
+    unexpected = Counter()
+    count_unexpected = lambda game: unexpected.update(game.get_timings()["unexpectedTransitions"])
+    stuck, errors = [], []
+    games = updates = game_updates = 0
+    game_seed = rng.getrandbits(32)
+    game, bots = new_game(game_seed)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+        while games + len(stuck) + len(errors) < n_games:
+            state = json.loads(game.get_json())
+            phase = state["gamePhase"]
+            try:
+                game.update_game(*bots.next_input(state))
+            except Exception:
+                errors.append((game_seed, phase, traceback.format_exc()))
+                count_unexpected(game)
+                game_seed = rng.getrandbits(32)
+                (game, bots), game_updates = new_game(game_seed), 0
+                continue
+            phases[phase] += 1
+            updates += 1
+            game_updates += 1
+
+            # Confirming game over resets the game to setup. The next game starts fresh from
+            # its own seed, so any game can be reproduced from the seed reported with it
+            if phase == "gameover" and game.state == SnakesLaddersGameState.SETUP:
+                games += 1
+                count_unexpected(game)
+                game_seed = rng.getrandbits(32)
+                (game, bots), game_updates = new_game(game_seed), 0
+            elif game_updates >= max_updates:
+                stuck.append((game_seed, phase, game_updates))
+                count_unexpected(game)
+                game_seed = rng.getrandbits(32)
+                (game, bots), game_updates = new_game(game_seed), 0
+
+    return SelfPlayResult(games, updates, time.perf_counter() - start, phases, stuck, errors, unexpected,
+                          discarded.frames)
+
+if __name__ == "__main__":
+    n_games = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    n_players = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    for name, value in self_play(n_games, n_players).summary().items():
+        print(f"{name}: {value}")
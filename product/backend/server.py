@@ -1,7 +1,25 @@
 from fastapi import WebSocket, FastAPI, WebSocketDisconnect, HTTPException, Request
-from asyncio import Event, exceptions
+from fastapi.responses import PlainTextResponse, JSONResponse
+from asyncio import Queue, Task, create_task
+from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from time import perf_counter, monotonic
+import json
+import os
+
+from relay import Relay
+from static_files import PrecompressedFiles
+import metrics
+import tracing
+
+# Path of the Unix socket used to share frames between workers. Set this when running
+# uvicorn with --workers > 1, otherwise each worker only broadcasts to its own clients.
+RELAY_SOCKET = os.environ.get("RELAY_SOCKET")
+
+# Directory of the built frontend to serve. Set this in production to serve the display page from this
+# server, on the same origin as the websocket, instead of running a separate Node server.
+FRONTEND_DIST = os.environ.get("FRONTEND_DIST")
 
 """
 The object that the server recognises in the post request. Not sure why it works but it does.
@@ -9,15 +27,164 @@ The object that the server recognises in the post request. Not sure why it works
 class Item(BaseModel):
     name: str
 
-app = FastAPI()
+class Frame(BaseModel):
+    """
+    A single frame sent in a batch to /post/batch/.
+    seq orders the frames, ts is when the frame was produced, and data is the JSON string to display.
+    """
+    seq: int
+    ts: float
+    data: str
+
+class FrameBatch(BaseModel):
+    """
+    Body of a /post/batch/ request.
+    """
+    frames: list[Frame]
 
-# Event that keeps clients connected?
-has_new_data = Event()
+# Relay between workers. None when running as a single worker
+relay: Relay | None = None
+# Built frontend files. None when the frontend is served separately
+frontend: PrecompressedFiles | None = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global relay, frontend
+    if FRONTEND_DIST:
+        frontend = PrecompressedFiles(FRONTEND_DIST)
+    if RELAY_SOCKET:
+        relay = Relay(RELAY_SOCKET, deliver)
+        await relay.start()
+    yield
+    if relay is not None:
+        await relay.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 last_data_received: str = ""
 
-# Global list of connections
-connections: list[WebSocket] = []
+class Client:
+    """
+    A connected websocket client.
+    Frames are queued per client and sent by the client's own task, so a slow client
+    does not hold up the broadcast to the others.
+    Clients choose a policy when connecting with /ws?policy=...
+        "all": every frame is sent, in order. Default. A client that falls MAX_QUEUE_DEPTH frames behind
+            can no longer be sent every frame, so it is disconnected. The display then reconnects.
+        "latest": frames still waiting to be sent are replaced by newer ones.
+    """
+    def __init__(self, websocket: WebSocket, client_id: int, policy: str = "all") -> None:
+        self.websocket = websocket
+        self.id = client_id
+        self.policy = policy
+        # Queued (frame, time received, trace) waiting to be sent.
+        # trace is the frame's (trace id, monotonic time received), or None if it isn't traced
+        # Bounded so a client that falls behind can't grow the server's memory without limit
+        self.queue: Queue[tuple[bytes, float, tuple[int, float] | None]] = Queue(maxsize=MAX_QUEUE_DEPTH)
+        self.task: Task | None = None
+        # Trace id -> (time received, send started, send finished) of traced frames not yet acknowledged
+        self.deliveries: dict[int, tuple[float, float, float]] = {}
+
+    def put(self, data: bytes, received: float, trace: tuple[int, float] = None) -> None:
+        """
+        Queues data to be sent, following the client's policy.
+        """
+        if self.policy == "latest":
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                FRAMES_DROPPED.inc()
+        elif self.queue.full():
+            self.drop()
+            return
+        self.queue.put_nowait((data, received, trace))
+
+    def drop(self) -> None:
+        """
+        Disconnects the client for falling too far behind, closing its websocket so the display reconnects.
+        """
+        CLIENTS_DROPPED.inc()
+        connections.pop(self.id, None)
+        if self.task is not None:
+            self.task.cancel()
+        print("Client:", self.id, "fell behind and was disconnected")
+        create_task(self._close(1013, "Client fell behind"))
+
+    async def _close(self, code: int, reason: str) -> None:
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except RuntimeError:
+            # Already closed
+            pass
+
+    async def send_loop(self) -> None:
+        """
+        Sends queued frames to the client in order until it disconnects.
+        """
+        global average_send_time
+        while True:
+            data, received, trace = await self.queue.get()
+            sent = perf_counter()
+            send_start = monotonic()
+            try:
+                await self.websocket.send_bytes(data)
+            except (RuntimeError, WebSocketDisconnect):
+                # Stop broadcast queuing frames for the client before its receive loop notices
+                connections.pop(self.id, None)
+                print("Client:", self.id, "has Disconnected")
+                return
+            if trace is not None:
+                self.deliveries[trace[0]] = (trace[1], send_start, monotonic())
+                # Forget the oldest frames if the client never acknowledges them
+                if len(self.deliveries) > MAX_UNACKNOWLEDGED:
+                    del self.deliveries[next(iter(self.deliveries))]
+            average_send_time += SEND_TIME_SMOOTHING * (perf_counter() - sent - average_send_time)
+            BYTES_SENT.inc(len(data))
+            DELIVERY_LATENCY.observe(perf_counter() - received)
+
+    def acknowledge(self, message: str) -> None:
+        """
+        Completes the trace of a frame the client has acknowledged rendering. Other messages are ignored.
+        """
+        acked = monotonic()
+        try:
+            ack = json.loads(message)
+            delivery = self.deliveries.pop(ack["ack"]["id"])
+            traces.add(tracing.from_ack(ack, self.id, delivery, acked))
+        except (KeyError, TypeError, ValueError):
+            return
+
+# Connected clients by id
+connections: dict[int, Client] = {}
+next_client_id: int = 0
+
+# Moving average of the time taken to send one frame to a client, used for backpressure
+average_send_time: float = 0.0
+SEND_TIME_SMOOTHING = 0.1
+# Longest frame interval suggested to producers, in seconds
+MAX_FRAME_INTERVAL = 1.0
+# Frames queued per "all" policy client before it is disconnected
+MAX_QUEUE_DEPTH = 256
+# Traced frames remembered per client while waiting for it to acknowledge them
+MAX_UNACKNOWLEDGED = 32
+
+# Traces of frames acknowledged by this worker's clients, served at /traces
+traces = tracing.TraceLog()
+
+# Server metrics, served at /metrics. Each worker reports its own values, see tebs_worker_pid.
+registry = metrics.Registry()
+FRAMES_INGESTED = registry.add(metrics.Counter("tebs_frames_ingested_total", "Frames received on /post/ and /post/batch/."))
+INGEST_RATE = registry.add(metrics.Rate("tebs_frames_ingested_per_second", "Frames received per second over the last 10 seconds."))
+BYTES_INGESTED = registry.add(metrics.Counter("tebs_ingested_bytes_total", "Bytes of frame data received."))
+INGEST_LATENCY = registry.add(metrics.Histogram("tebs_ingest_seconds", "Time spent handling an ingest request."))
+BROADCAST_LATENCY = registry.add(metrics.Histogram("tebs_broadcast_seconds", "Time taken to fan a frame out to every client queue."))
+DELIVERY_LATENCY = registry.add(metrics.Histogram("tebs_delivery_seconds", "Time from a frame being received to it being sent to a client."))
+FRAMES_DROPPED = registry.add(metrics.Counter("tebs_frames_dropped_total", "Queued frames replaced by newer ones for \"latest\" policy clients."))
+CLIENTS_DROPPED = registry.add(metrics.Counter("tebs_clients_dropped_total", "Clients disconnected for falling MAX_QUEUE_DEPTH frames behind."))
+BYTES_SENT = registry.add(metrics.Counter("tebs_sent_bytes_total", "Bytes sent to websocket clients."))
+registry.add(metrics.Gauge("tebs_connected_clients", "Websocket clients connected to this worker.", lambda: len(connections)))
+registry.add(metrics.Gauge("tebs_client_queue_depth", "Frames waiting to be sent to each client.",
+                           lambda: {c.id: c.queue.qsize() for c in connections.values()}, "client"))
+registry.add(metrics.Gauge("tebs_worker_pid", "Process id of the worker that served this scrape.", os.getpid))
 
 # Not sure what this does. Might assist in keeping clients connected
 app.add_middleware(
@@ -28,52 +195,137 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Send given data string to all connected clients
-async def broadcast(data: str) -> None:
-    #print("Broadcasting to", len(connections), "clients")
+# Queue given data to be sent to all connected clients
+async def broadcast(data: bytes, received: float = None) -> None:
+    start = perf_counter()
+    if received is None:
+        received = start
+    # Traces are timed with monotonic, which the app shares
+    trace_id = tracing.frame_trace_id(data)
+    trace = (trace_id, monotonic()) if trace_id is not None else None
 
-    for client in connections:
-        #print("sending data to:", client)
-        try:
-            await client.send_text(data)
+    # Clients that have fallen behind are removed while putting, so iterate over a copy
+    for client in list(connections.values()):
+        client.put(data, received, trace)
 
-        except RuntimeError:
-            print("RuntimeError")
+    BROADCAST_LATENCY.observe(perf_counter() - start)
 
-        except WebSocketDisconnect:
-            print("Client:", await disconnect(client), "has Disconnected")
+# Stores the latest frame then sends it to this worker's clients
+async def deliver(data: bytes) -> None:
+    global last_data_received
+    last_data_received = data.decode()
+    await broadcast(data)
 
 #async def update(data: str) -> None:
 #    stored_data = data
 #    await broadcast(data)
 
-# Adds client to list of connections
-async def connect(websocket: WebSocket) -> None:
-    connections.append(websocket)
+# Adds client to connections and starts sending it frames
+async def connect(websocket: WebSocket, policy: str = "all") -> Client:
+    global next_client_id
+    client = Client(websocket, next_client_id, policy)
+    next_client_id += 1
+    connections[client.id] = client
+    client.task = create_task(client.send_loop())
+    return client
+
+# Removes client from connections and stops sending it frames. Returns the client's id
+async def disconnect(client: Client) -> int:
+    connections.pop(client.id, None)
+    if client.task is not None:
+        client.task.cancel()
+    return client.id
 
-# Removes client from list of connections. Don't think .remove can find specific client... may need dictionary of ids -> websockets
-async def disconnect(client: WebSocket) -> None:
-    connections.remove(client)
+# Returns how far behind the clients are, sent back to producers in response to each ingest request.
+# frameInterval is the suggested minimum time between frames for the slowest client's queue to drain
+def backpressure() -> dict:
+    depth = max((c.queue.qsize() for c in connections.values()), default=0)
+    return {
+        "queueDepth": depth,
+        "clients": len(connections),
+        "frameInterval": min(average_send_time * depth, MAX_FRAME_INTERVAL)
+    }
 
 # Entrypoint for backend to update data to be displayed. Hacky and janky, but I was able to get this working.
 @app.post("/post/")
 async def create_item(request: Request):
-    await broadcast(await request.body())
+    start = perf_counter()
+    data = await request.body()
+    FRAMES_INGESTED.inc()
+    INGEST_RATE.mark()
+    BYTES_INGESTED.inc(len(data))
+    if relay is not None:
+        # Every worker, including this one, broadcasts the frame to its own clients
+        await relay.publish(data)
+    else:
+        await deliver(data)
+    INGEST_LATENCY.observe(perf_counter() - start)
+    return backpressure()
 
+# Entrypoint for sending several frames in one request. Frames are broadcast in seq order
+@app.post("/post/batch/")
+async def create_items(batch: FrameBatch):
+    start = perf_counter()
+    frames = sorted(batch.frames, key=lambda f: f.seq)
+    FRAMES_INGESTED.inc(len(frames))
+    INGEST_RATE.mark(len(frames))
+    for frame in frames:
+        data = frame.data.encode()
+        BYTES_INGESTED.inc(len(data))
+        if relay is not None:
+            await relay.publish(data)
+        else:
+            await deliver(data)
+    INGEST_LATENCY.observe(perf_counter() - start)
+    return backpressure()
 
 @app.get("/")
-async def get():
+async def get(request: Request):
+    if frontend is not None:
+        return frontend.response("index.html", request.headers.get("accept-encoding", ""))
     return last_data_received
 
+# Server performance metrics in the Prometheus text format
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+# Traces of frames acknowledged by this worker's clients, in the Chrome trace event format.
+# Save the response to a file and open it in chrome://tracing or https://ui.perfetto.dev
+@app.get("/traces")
+async def get_traces():
+    return JSONResponse(traces.chrome_trace())
+
+# Latency of each stage of the traced frames, in seconds
+@app.get("/traces/summary")
+async def get_trace_summary():
+    return traces.summary()
+
 # Client connection point
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(websocket: WebSocket, policy: str = "all"):
+    if policy not in ("all", "latest"):
+        await websocket.close(code=1008, reason="policy must be 'all' or 'latest'")
+        return
     await websocket.accept()
-    await connect(websocket)
+    client = await connect(websocket, policy)
 
-    # Tries to stop client from disconnecting. Might work?
+    # Keep the connection open until the client disconnects. The client acknowledges traced frames once rendered
     while True:
-        try: 
-            await has_new_data.wait()
-        except exceptions.CancelledError:
-            return
\ No newline at end of file
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            break
+        # Acknowledgements are text. Binary messages are ignored
+        if message.get("text") is not None:
+            client.acknowledge(message["text"])
+    print("Client:", await disconnect(client), "has Disconnected")
+
+# Files of the built frontend, when FRONTEND_DIST is set. Must be the last route so it doesn't hide the others
+@app.get("/{path:path}")
+async def get_frontend_file(path: str, request: Request):
+    response = None
+    if frontend is not None:
+        response = frontend.response(path, request.headers.get("accept-encoding", ""))
+    if response is None:
+        raise HTTPException(status_code=404)
+    return response
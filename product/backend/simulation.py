@@ -0,0 +1,417 @@
+"""
+Headless Monte Carlo simulation of whole Snakes and Ladders games.
+
+Used to tune CardManager.weights and the SNAKES and LADDERS pools, which needs statistics from
+far more games than can be played through SnakesAndLadders one turn at a time. Each player's
+tile in every game is held in NumPy arrays and each turn is applied to all games at once.
+
+The rules follow SnakesAndLadders and the cards in game_components. Pieces are assumed to always
+be placed on the correct squares, and each minigame is won with a fixed probability.
+
+A snake or ladder pool where entities lead into each other in a loop would make
+SnakesAndLadders.move_player never return. The simulation stops such games and reports them as stuck.
+
+Usage:
+    results = simulate(1_000_000, n_players=4)
+    print(results.summary())
+
+Or from /product:
+    python -m backend.simulation [n_games] [n_players]
+"""
+import sys
+from functools import partial
+
+import numpy as np
+
+from .board_geometry import BoardGeometry, get_geometry
+from .game import SNAKES, LADDERS
+from .game_components import *
+
+# Tile of a player who has not moved onto the board yet
+OFF_BOARD = -1
+# Kinds of entity in the jump tables
+NO_ENTITY = 0
+SNAKE = 1
+LADDER = 2
+# Larger than any tile, used to mask out tiles when searching for the nearest
+FAR = np.iinfo(np.int32).max
+
+class Layouts:
+    """
+    The snakes and ladders of a batch of games. Each game's layout is sampled from the pools in
+    the same way as SnakesAndLadders, and the layout after a Swap Snakes and Ladders card is also stored.
+
+    Jump tables are indexed by [game, swapped, tile], where swapped is 1 after an odd number of swaps.
+    kind holds the entity at each tile and dest the tile it leads to. As in SnakesAndLadders,
+    a snake takes priority over a ladder on the same tile, and the first entity in a list over later ones.
+    """
+
+    def __init__(self, n_games: int, geometry: BoardGeometry, snakes: list, ladders: list,
+                 num_snakes: int, num_ladders: int, rng: np.random.Generator) -> None:
+        # Tile of each (r,c) position in the pools, as arrays of shape (pool size, 2)
+        snake_pool = np.array([[geometry.tile(head), geometry.tile(tail)] for head, tail in snakes], dtype=np.int16)
+        ladder_pool = np.array([[geometry.tile(bottom), geometry.tile(top)] for bottom, top in ladders], dtype=np.int16)
+        chosen_snakes = snake_pool[self._sample(n_games, len(snakes), num_snakes, rng)]
+        chosen_ladders = ladder_pool[self._sample(n_games, len(ladders), num_ladders, rng)]
+
+        # Entity tiles of shape (n_games, 2, number of entities). Second axis is swapped
+        self.snake_heads = np.stack([chosen_snakes[..., 0], chosen_snakes[..., 0]], axis=1)
+        self.snake_tails = np.stack([chosen_snakes[..., 1], chosen_snakes[..., 1]], axis=1)
+        ladder_bottoms = np.stack([chosen_ladders[..., 0], chosen_ladders[..., 0]], axis=1)
+        ladder_tops = np.stack([chosen_ladders[..., 1], chosen_ladders[..., 1]], axis=1)
+
+        # Swapping pairs snake i with ladder i. Snake i now runs from ladder i's top to its bottom,
+        # and ladder i from snake i's tail to its head. See SwapSnakesAndLaddersCard
+        pairs = min(num_snakes, num_ladders)
+        self.snake_heads[:, 1, :pairs] = chosen_ladders[:, :pairs, 1]
+        self.snake_tails[:, 1, :pairs] = chosen_ladders[:, :pairs, 0]
+        ladder_bottoms[:, 1, :pairs] = chosen_snakes[:, :pairs, 1]
+        ladder_tops[:, 1, :pairs] = chosen_snakes[:, :pairs, 0]
+
+        # Tiles past the last square never have entities, so lookups are clipped to the last entry
+        self.size = geometry.n_tiles + 2
+        self.kind = np.zeros((n_games, 2, self.size), dtype=np.int8)
+        self.dest = np.zeros((n_games, 2, self.size), dtype=np.int16)
+        games = np.arange(n_games)
+        for swapped in (0, 1):
+            # Written in reverse so the first entity on a tile is the one kept, and snakes last so they take priority
+            for i in reversed(range(ladder_bottoms.shape[2])):
+                self.kind[games, swapped, ladder_bottoms[:, swapped, i]] = LADDER
+                self.dest[games, swapped, ladder_bottoms[:, swapped, i]] = ladder_tops[:, swapped, i]
+            for i in reversed(range(self.snake_heads.shape[2])):
+                self.kind[games, swapped, self.snake_heads[:, swapped, i]] = SNAKE
+                self.dest[games, swapped, self.snake_heads[:, swapped, i]] = self.snake_tails[:, swapped, i]
+
+    def _sample(self, n_games: int, pool_size: int, k: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        Returns k distinct pool indices in random order for each game, like random.sample.
+        If k > pool_size or < 0, all of the pool is used, as in SnakesAndLadders.
+        """
+        if k < 0 or k > pool_size:
+            k = pool_size
+        return np.argsort(rng.random((n_games, pool_size)), axis=1)[:, :k]
+
+    def lookup(self, games: np.ndarray, swapped: np.ndarray, tiles: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the (kind, dest) of the entity on tiles in games.
+        """
+        tiles = np.minimum(tiles, self.size - 1)
+        return self.kind[games, swapped, tiles], self.dest[games, swapped, tiles]
+
+class SimulationResult:
+    """
+    Outcome of every simulated game.
+        turns: number of turns each game lasted, or -1 if it did not finish.
+        winners: turn order index of each game's winner, or -1 if it did not finish.
+        minigames: number of minigames played in each game.
+        stuck: True for games stopped because a move would never end.
+    """
+
+    def __init__(self, n_players: int, turns: np.ndarray, winners: np.ndarray, minigames: np.ndarray,
+                 stuck: np.ndarray) -> None:
+        self.n_players = n_players
+        self.turns = turns
+        self.winners = winners
+        self.minigames = minigames
+        self.stuck = stuck
+
+    def summary(self) -> dict:
+        """
+        Returns summary statistics of game length, wins per turn order position and minigames played.
+        Only finished games are included in the turn statistics.
+        """
+        finished = self.turns >= 0
+        turns = self.turns[finished]
+        wins = np.bincount(self.winners[finished], minlength=self.n_players)
+        return {
+            "games": len(self.turns),
+            "unfinished": int(np.count_nonzero(~finished & ~self.stuck)),
+            "stuck": int(np.count_nonzero(self.stuck)),
+            "meanTurns": float(turns.mean()) if turns.size else None,
+            "medianTurns": float(np.median(turns)) if turns.size else None,
+            "p90Turns": float(np.percentile(turns, 90)) if turns.size else None,
+            "p99Turns": float(np.percentile(turns, 99)) if turns.size else None,
+            "winRate": (wins / max(turns.size, 1)).tolist(),
+            "meanMinigames": float(self.minigames.mean())
+        }
+
+class Simulation:
+    """
+    A batch of games played in lockstep. Every game takes its turn at the same time, so the
+    current player is the same turn order index in every game.
+    """
+
+    def __init__(self, n_games: int, n_players: int, layouts: Layouts, deck: list, weights: list[float],
+                 minigame_win_prob: float, n_tiles: int, rng: np.random.Generator) -> None:
+        self.n_players = n_players
+        self.layouts = layouts
+        self.minigame_win_prob = minigame_win_prob
+        self.n_tiles = n_tiles
+        self.rng = rng
+        self.tiles = np.full((n_games, n_players), OFF_BOARD, dtype=np.int16)
+        self.swapped = np.zeros(n_games, dtype=np.int8)
+        self.minigames = np.zeros(n_games, dtype=np.int32)
+        self.stuck = np.zeros(n_games, dtype=bool)
+        # More steps than any move can take without entities leading into each other in a loop
+        self.max_settle_steps = 2 * layouts.size
+
+        # Vectorised versions of the effect primitives in game_components.EFFECTS
+        effects = {
+            "roll_dice": self._roll_dice,
+            "none": self._no_effect,
+            "swap_with_leader": self._swap_with_lead,
+            "descend_snake": self._descend_snake,
+            "all_forward": self._all_forward,
+            "helping_hand": self._helping_hand,
+            "swap_snakes_and_ladders": self._swap_snakes_and_ladders
+        }
+        self.effects = []
+        for card, weight in zip(deck, weights):
+            definition = CARD_TABLE.by_type[card]
+            # Dice roll duels are deprecated and need players to pick up pieces
+            if weight > 0 and (definition.resolve == RESOLVE_DUEL or definition.effect not in effects):
+                raise ValueError(f"{card.__name__} can't be simulated. Set its weight to 0")
+            if definition.effect == "roll_dice":
+                self.effects.append(self._roll_dice)
+            else:
+                self.effects.append(partial(effects.get(definition.effect, self._no_effect), **definition.params))
+        # Alias tables for drawing cards, as CardManager does, see CardSampler
+        sampler = CardSampler(weights)
+        self.card_prob = np.array(sampler.prob)
+        self.card_alias = np.array(sampler.alias)
+        self.roll_dice = deck.index(RollDiceCard)
+
+    def _draw_cards(self, n: int) -> np.ndarray:
+        """
+        Returns the indexes in the deck of n independently drawn cards.
+        """
+        u = self.rng.random(n) * len(self.card_prob)
+        picks = u.astype(np.intp)
+        return np.where(u - picks < self.card_prob[picks], picks, self.card_alias[picks])
+
+    def run(self, max_turns: int) -> SimulationResult:
+        """
+        Plays every game until it is over or max_turns turns have been taken.
+        """
+        n_games = len(self.tiles)
+        turns = np.full(n_games, -1, dtype=np.int32)
+        winners = np.full(n_games, -1, dtype=np.int8)
+        active = np.arange(n_games)
+
+        for turn in range(max_turns):
+            seat = turn % self.n_players
+            # Every player's first turn is a dice roll
+            if turn < self.n_players:
+                cards = np.full(len(active), self.roll_dice)
+            else:
+                cards = self._draw_cards(len(active))
+            for card, effect in enumerate(self.effects):
+                games = active[cards == card]
+                if games.size:
+                    effect(games, seat)
+
+            # Game is over once any player reaches the last square
+            over = (self.tiles[active] >= self.n_tiles).any(axis=1) & ~self.stuck[active]
+            finished = active[over]
+            turns[finished] = turn + 1
+            winners[finished] = self._leaders(finished)
+            active = active[~over & ~self.stuck[active]]
+            if not active.size:
+                break
+
+        return SimulationResult(self.n_players, turns, winners, self.minigames, self.stuck)
+
+    def _leaders(self, games: np.ndarray) -> np.ndarray:
+        """
+        Returns the turn order index of the player furthest ahead in each game.
+        If several players share the furthest tile, the one who joined first is returned, as in get_leader.
+        """
+        return np.argmax(self.tiles[games], axis=1)
+
+    def _entity(self, games: np.ndarray, tiles: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the (kind, dest) of the entity on tiles in games' current layouts.
+        """
+        return self.layouts.lookup(games, self.swapped[games], tiles)
+
+    def _settle(self, games: np.ndarray, seats: np.ndarray, minigames_enabled: bool = False) -> np.ndarray:
+        """
+        Resolves the players at seats in games from their current tiles, as move_player does.
+        Players are carried along snakes and ladders, and moved forward while another player is on their tile.
+        As in move_player, a player bumped off an occupied tile moves one tile past the last tile they
+        stepped onto, rather than past where a snake or ladder took them.
+        If minigames_enabled is set, players instead stop on the first snake or ladder they reach.
+        Returns a mask of the players that stopped on a snake or ladder.
+        Games where a player would never stop moving are marked as stuck.
+        """
+        triggered = np.zeros(len(games), dtype=bool)
+        moving = np.arange(len(games))
+        # Last tile each player stepped onto
+        stepped = self.tiles[games, seats]
+        for _ in range(self.max_settle_steps):
+            if not moving.size:
+                break
+            g, s = games[moving], seats[moving]
+            tiles = self.tiles[g, s]
+            same_tile = self.tiles[g] == tiles[:, None]
+            same_tile[np.arange(len(g)), s] = False
+            occupied = same_tile.any(axis=1)
+            kind, dest = self._entity(g, tiles)
+            on_entity = ~occupied & (kind != NO_ENTITY)
+
+            if minigames_enabled:
+                triggered[moving[on_entity]] = True
+                self.tiles[g, s] = tiles + occupied
+                moving = moving[occupied]
+            else:
+                stepped[moving[occupied]] += 1
+                self.tiles[g, s] = np.where(occupied, stepped[moving], np.where(on_entity, dest, tiles))
+                moving = moving[occupied | on_entity]
+        else:
+            self.stuck[games[moving]] = True
+        return triggered
+
+    def _roll_dice(self, games: np.ndarray, seat: int) -> None:
+        """
+        roll_dice. The current player moves 1-6 tiles, playing a minigame if they stop on a snake or ladder.
+        """
+        seats = np.full(len(games), seat)
+        start = np.maximum(self.tiles[games, seat], 0)
+        self.tiles[games, seat] = start + self.rng.integers(1, 7, size=len(games))
+        triggered = self._settle(games, seats, minigames_enabled=True)
+        self._play_minigames(games[triggered], seats[triggered])
+
+    def _play_minigames(self, games: np.ndarray, seats: np.ndarray) -> None:
+        """
+        Plays a minigame for the players at seats in games, who are on a snake or ladder.
+        Winning climbs a ladder and losing slides down a snake, otherwise the player stays put.
+        """
+        self.minigames[games] += 1
+        kind, dest = self._entity(games, self.tiles[games, seats])
+        win = self.rng.random(len(games)) < self.minigame_win_prob
+        move = ((kind == LADDER) & win) | ((kind == SNAKE) & ~win)
+        self.tiles[games[move], seats[move]] = dest[move]
+        self._settle(games[move], seats[move])
+
+    def _no_effect(self, games: np.ndarray, seat: int) -> None:
+        """
+        none. Nothing happens.
+        """
+        pass
+
+    def _swap_with_lead(self, games: np.ndarray, seat: int) -> None:
+        """
+        swap_with_leader. The current player swaps tiles with the leader.
+        """
+        leaders = self._leaders(games)
+        swap = leaders != seat
+        games, leaders = games[swap], leaders[swap]
+        current = self.tiles[games, seat]
+        self.tiles[games, seat] = self.tiles[games, leaders]
+        self.tiles[games, leaders] = current
+
+    def _descend_snake(self, games: np.ndarray, seat: int) -> None:
+        """
+        descend_snake. The current player moves to the tail of the nearest snake ahead of them, if there is one.
+        """
+        rows = np.arange(len(games))
+        swapped = self.swapped[games]
+        heads = self.layouts.snake_heads[games, swapped].astype(np.int32)
+        ahead = np.where(heads > self.tiles[games, seat][:, None], heads, FAR)
+        nearest = np.argmin(ahead, axis=1)
+        found = ahead[rows, nearest] != FAR
+        tails = self.layouts.snake_tails[games, swapped][rows, nearest]
+        games = games[found]
+        self.tiles[games, seat] = tails[found]
+        self._settle(games, np.full(len(games), seat))
+
+    def _all_forward(self, games: np.ndarray, seat: int, spaces: int) -> None:
+        """
+        all_forward. Every player moves spaces tiles, in the order of get_standings.
+        """
+        tiles = self.tiles[games]
+        joined = np.broadcast_to(np.arange(self.n_players), tiles.shape)
+        # Furthest first, and first joined first on shared tiles
+        order = np.lexsort((joined, -tiles), axis=1)
+        for i in range(self.n_players):
+            seats = order[:, i]
+            on_board = self.tiles[games, seats] != OFF_BOARD
+            g, s = games[on_board], seats[on_board]
+            self.tiles[g, s] += spaces
+            self._settle(g, s)
+
+    def _helping_hand(self, games: np.ndarray, seat: int) -> None:
+        """
+        helping_hand. The player in last place moves to the tile behind the next player ahead of them.
+        """
+        rows = np.arange(len(games))
+        tiles = self.tiles[games].astype(np.int32)
+        on_board = tiles != OFF_BOARD
+        last = np.argmin(np.where(on_board, tiles, FAR), axis=1)
+        last_tile = tiles[rows, last]
+        ahead = np.where(on_board & (tiles > last_tile[:, None]), tiles, FAR)
+        next_tile = ahead[rows, np.argmin(ahead, axis=1)]
+        spaces = next_tile - last_tile - 1
+        move = (next_tile != FAR) & (spaces > 0)
+        games, last = games[move], last[move]
+        self.tiles[games, last] += spaces[move].astype(np.int16)
+        self._settle(games, last)
+
+    def _swap_snakes_and_ladders(self, games: np.ndarray, seat: int) -> None:
+        """
+        swap_snakes_and_ladders. Snakes and ladders swap, then any player on a snake or ladder moves one tile.
+        """
+        self.swapped[games] ^= 1
+        for s in range(self.n_players):
+            tiles = self.tiles[games, s]
+            kind, _ = self._entity(games, np.maximum(tiles, 0))
+            on_entity = (tiles != OFF_BOARD) & (kind != NO_ENTITY)
+            g = games[on_entity]
+            self.tiles[g, s] += 1
+            self._settle(g, np.full(len(g), s))
+
+def simulate(n_games: int,
+             n_players: int = 4,
+             snakes: list = SNAKES,
+             ladders: list = LADDERS,
+             num_snakes: int = 7,
+             num_ladders: int = 7,
+             weights: list[float] = None,
+             minigame_win_prob: float = 0.5,
+             max_turns: int = 1000,
+             n_rows: int = 10,
+             n_cols: int = 10,
+             batch_size: int = 50_000,
+             seed: int = None) -> SimulationResult:
+    """
+    Plays n_games games of Snakes and Ladders with n_players players each.
+    Each game's snakes and ladders are sampled from the snakes and ladders pools.
+    Cards are drawn from CardManager's deck using weights, or CardManager's weights if None.
+    Games are simulated batch_size at a time to limit memory use.
+    """
+    deck = CardManager().deck
+    if weights is None:
+        weights = CardManager().weights
+    geometry = get_geometry(n_rows, n_cols)
+    rng = np.random.default_rng(seed)
+
+    results = []
+    for start in range(0, n_games, batch_size):
+        size = min(batch_size, n_games - start)
+        layouts = Layouts(size, geometry, snakes, ladders, num_snakes, num_ladders, rng)
+        simulation = Simulation(size, n_players, layouts, deck, weights, minigame_win_prob, geometry.n_tiles, rng)
+        results.append(simulation.run(max_turns))
+
+    return SimulationResult(
+        n_players,
+        np.concatenate([r.turns for r in results]),
+        np.concatenate([r.winners for r in results]),
+        np.concatenate([r.minigames for r in results]),
+        np.concatenate([r.stuck for r in results])
+    )
+
+if __name__ == "__main__":
+    n_games = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_players = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    for name, value in simulate(n_games, n_players).summary().items():
+        print(f"{name}: {value}")
@@ -0,0 +1,108 @@
+"""
+Saving and loading game snapshots, so a game survives app.py crashing or the Pi rebooting.
+
+Snapshots are the bytes returned by SnakesAndLadders.snapshot. They are written to a temporary file
+which then replaces the snapshot file, so a crash mid-write never leaves a partial snapshot behind.
+Writing and syncing to the SD card happens on a background thread, so the game loop only pays for
+encoding the snapshot. If snapshots are saved faster than they can be written, only the latest is written.
+
+Usage:
+    writer = SnapshotWriter(SNAPSHOT_PATH)
+    writer.save(game.snapshot())
+
+    data = load_snapshot(SNAPSHOT_PATH)
+    if data is not None:
+        game.restore(data)
+"""
+import os
+import threading
+
+# Default location of the snapshot, next to the backend package
+SNAPSHOT_PATH = os.path.join(os.path.dirname(__file__), "game_snapshot.bin")
+
+def write_atomic(path: str, data: bytes) -> None:
+    """
+    Writes data to path so that path always holds either the old or the new contents.
+    """
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+def load_snapshot(path: str = SNAPSHOT_PATH) -> bytes | None:
+    """
+    Returns the snapshot saved at path, or None if there isn't one.
+    """
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+def delete_snapshot(path: str = SNAPSHOT_PATH) -> None:
+    """
+    Removes the snapshot saved at path, if there is one.
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+class SnapshotWriter:
+    """
+    Writes snapshots to path on a background thread.
+    """
+
+    def __init__(self, path: str = SNAPSHOT_PATH) -> None:
+        self.path = path
+        self._pending: bytes | None = None
+        self._delete = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def save(self, data: bytes) -> None:
+        """
+        Queues data to be written, replacing any snapshot not yet written.
+        """
+        with self._condition:
+            self._pending = data
+            self._delete = False
+            self._condition.notify()
+
+    def clear(self) -> None:
+        """
+        Queues the snapshot file to be deleted, e.g. once a game is over.
+        """
+        with self._condition:
+            self._pending = None
+            self._delete = True
+            self._condition.notify()
+
+    def flush(self) -> None:
+        """
+        Waits until every queued snapshot has been written.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._pending is None and not self._delete)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._delete)
+                data, delete = self._pending, self._delete
+            try:
+                if delete:
+                    delete_snapshot(self.path)
+                else:
+                    write_atomic(self.path, data)
+            except OSError as e:
+                print("Could not save game snapshot:", e)
+            with self._condition:
+                # Only mark done if nothing newer was queued while writing
+                if self._pending is data and self._delete == delete:
+                    self._pending = None
+                    self._delete = False
+                self._condition.notify_all()
@@ -0,0 +1,123 @@
+"""
+Serves the prebuilt frontend (the output of "npm run build") from the backend server.
+
+On startup every file is compressed once with gzip, and with brotli if the brotli package is
+installed. Compressed copies are stored next to the originals and only rebuilt when the
+original is newer. Requests are answered with the smallest encoding the browser accepts.
+
+Files in assets/ have content hashes in their names, so they are cached by the browser forever.
+Everything else, including index.html, is revalidated on each load so new builds are picked up.
+"""
+import gzip
+import mimetypes
+import os
+
+from fastapi.responses import FileResponse
+
+# Brotli compresses better than gzip but is an optional package
+try:
+    import brotli
+except ModuleNotFoundError:
+    brotli = None
+
+# Extensions worth compressing. Images are already compressed
+COMPRESSIBLE = (".html", ".js", ".css", ".json", ".svg", ".txt", ".map")
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    """
+    Returns the encodings an Accept-Encoding header accepts, leaving out any refused with q=0.
+    "*" stands for every encoding not listed.
+    """
+    accepted, refused = set(), set()
+    for item in accept_encoding.split(","):
+        encoding, *params = [part.strip() for part in item.split(";")]
+        if not encoding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        (accepted if q > 0 else refused).add(encoding.lower())
+    if "*" in accepted:
+        accepted.update(e for e in ("br", "gzip") if e not in refused)
+    return accepted
+
+class PrecompressedFiles:
+    """
+    Index of the files in a built frontend directory, along with their compressed copies.
+
+    Usage:
+        files = PrecompressedFiles("../frontend/interactive-system/dist")
+        return files.response("assets/index.js", request.headers.get("accept-encoding", ""))
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = os.path.realpath(directory)
+        if not os.path.isfile(os.path.join(self.directory, "index.html")):
+            raise FileNotFoundError(f"No built frontend found in {self.directory}. Run 'npm run build' first")
+        # Relative path -> list of (encoding, file path), best encoding first
+        self._files: dict[str, list[tuple[str, str]]] = {}
+        self._index()
+
+    def _index(self) -> None:
+        """
+        Finds every file in the directory, compressing any that are new or have changed.
+        """
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith((".gz", ".br", ".tmp")):
+                    continue
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, self.directory).replace(os.sep, "/")
+                encodings = []
+                if name.endswith(COMPRESSIBLE):
+                    if brotli is not None:
+                        encodings.append(("br", self._compress(path, ".br", brotli.compress)))
+                    encodings.append(("gzip", self._compress(path, ".gz", lambda data: gzip.compress(data, 9))))
+                encodings.append(("identity", path))
+                self._files[relative] = encodings
+
+    def _compress(self, path: str, suffix: str, compress: callable) -> str:
+        """
+        Writes a compressed copy of path with the given suffix if it doesn't exist or is out of date.
+        Returns the compressed copy's path.
+        Every worker indexes the files on startup, so the copy is written to a temporary file of this
+        process's own, which then replaces it. Other workers never see a partly written copy.
+        """
+        compressed_path = path + suffix
+        if not os.path.exists(compressed_path) or os.path.getmtime(compressed_path) < os.path.getmtime(path):
+            with open(path, "rb") as file:
+                data = compress(file.read())
+            temp_path = f"{compressed_path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, compressed_path)
+        return compressed_path
+
+    def response(self, path: str, accept_encoding: str) -> FileResponse | None:
+        """
+        Returns a response for the file at path, or None if there is no such file.
+        An empty path returns index.html.
+        """
+        path = path.strip("/") or "index.html"
+        encodings = self._files.get(path)
+        if encodings is None:
+            return None
+
+        accepted = accepted_encodings(accept_encoding)
+        encoding, file_path = next((e, p) for e, p in encodings if e == "identity" or e in accepted)
+
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE if path.startswith("assets/") else REVALIDATE_CACHE,
+            "Vary": "Accept-Encoding"
+        }
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        return FileResponse(file_path, media_type=media_type, headers=headers)
@@ -0,0 +1,155 @@
+"""
+Fixed-timestep scheduling for minigame loops, and publishing their frames without blocking.
+
+A minigame advances one tick at a time and counts its DURATION in ticks, so each tick must take TICK
+seconds of real time. Sleeping for TICK after each update makes a tick take TICK plus however long the
+update and sending the frame took, which drifts further behind the longer the minigame runs.
+Ticker instead keeps deadlines on the monotonic clock, start + n * tick, and sleeps until the next one.
+A tick that overruns its deadline is reported, and the next deadline is still the one after it, so
+the loop catches up. If it falls more than max_behind ticks behind, e.g. after the Pi stalls, it
+catches up by skipping those ticks rather than running them back to back.
+
+Sending a frame to the server blocks on HTTP, so minigames hand frames to a FramePublisher, which sends
+them on a background thread. If frames are published faster than they can be sent, only the latest
+is sent, as the display only needs to show the current state.
+
+Usage:
+    ticker = Ticker(TICK)
+    publisher = FramePublisher(utils.send_json)
+    ticker.start()
+    while not done:
+        update()
+        publisher.publish(get_json())
+        ticker.wait()
+    publisher.close()
+    print(ticker.stats())
+"""
+import threading
+from time import monotonic, sleep
+from typing import Callable
+
+# Ticks a loop may fall behind before skipping ticks to catch up
+MAX_BEHIND = 5
+
+class Ticker:
+    """
+    Deadlines for a loop that runs once every tick seconds.
+    clock and sleep can be replaced, e.g. to run minigames without real-time sleeps.
+    """
+
+    def __init__(self, tick: float, max_behind: int = MAX_BEHIND,
+                 clock: Callable[[], float] = monotonic, sleep: Callable[[float], None] = sleep) -> None:
+        self.tick = tick
+        self.max_behind = max_behind
+        self._clock = clock
+        self._sleep = sleep
+        self._deadline: float | None = None
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.max_lateness = 0.0
+        self.total_lateness = 0.0
+
+    def start(self) -> None:
+        """
+        Starts the first tick now, with its deadline one tick from now.
+        """
+        self._deadline = self._clock() + self.tick
+
+    def wait(self) -> None:
+        """
+        Sleeps until the current tick's deadline, which starts the next tick.
+        Returns immediately if the deadline has passed, recording the overrun. Starts the first tick if not started.
+        """
+        if self._deadline is None:
+            self.start()
+        lateness = self._clock() - self._deadline
+        if lateness <= 0:
+            self._sleep(-lateness)
+        else:
+            self.overruns += 1
+            self.total_lateness += lateness
+            self.max_lateness = max(self.max_lateness, lateness)
+            behind = int(lateness // self.tick)
+            if behind > self.max_behind:
+                self._deadline += behind * self.tick
+                self.skipped += behind
+        self.ticks += 1
+        self._deadline += self.tick
+
+    def stats(self) -> dict:
+        """
+        Returns the number of ticks waited for, how many overran their deadline and by how much in seconds,
+        and how many were skipped to catch up.
+        """
+        return {
+            "tick": self.tick,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "meanLateness": self.total_lateness / self.overruns if self.overruns else 0.0,
+            "maxLateness": self.max_lateness
+        }
+
+class FramePublisher:
+    """
+    Sends frames with send on a background thread, keeping only the latest frame not yet sent.
+    """
+
+    def __init__(self, send: Callable[[str], bool]) -> None:
+        self._send = send
+        self._pending: str | None = None
+        self._closed = False
+        self.published = 0
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def publish(self, data: str) -> None:
+        """
+        Queues data to be sent, replacing any frame not yet sent.
+        """
+        with self._condition:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = data
+            self.published += 1
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        """
+        Sends the queued frame, if any, then stops the background thread.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def stats(self) -> dict:
+        """
+        Returns the number of frames published, sent, dropped for a newer frame, and of those sent, that failed.
+        """
+        with self._condition:
+            return {"published": self.published, "sent": self.sent, "dropped": self.dropped, "failed": self.failed}
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._closed)
+                if self._pending is None:
+                    return
+                data, self._pending = self._pending, None
+            ok = False
+            try:
+                ok = self._send(data)
+            except Exception as e:
+                # Keep sending later frames. A custom send may raise where utils.send_json returns False
+                print(f"Error sending frame: {e!r}")
+            finally:
+                with self._condition:
+                    self.sent += 1
+                    if not ok:
+                        self.failed += 1
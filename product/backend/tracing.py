@@ -0,0 +1,265 @@
+"""
+End-to-end latency tracing of frames, from the board sensors being scanned to the display being rendered.
+
+When tracing is enabled in app.py, each input handled by the game loop starts a trace with its own id.
+The app times each stage of handling it (scanning the sensors, waiting for the loop to poll, update_game,
+get_json) and attaches the trace to the frame it sends, as a "trace" field at the end of the JSON.
+The server times the frame waiting in each client's queue and being sent. The display acknowledges
+traced frames on its websocket once they are rendered, echoing the trace with how long it took to parse
+and render. The server then has every stage of the frame's journey, and adds the completed trace to a TraceLog.
+
+Timestamps are seconds from time.monotonic, which is shared by every process on the Pi, so the app's
+and server's times can be compared. The browser's clock can't be, so the display only reports durations.
+The time the frame spent on the network is estimated as half of what remains of the round trip.
+
+TraceLog summarises each stage's latency, and exports the traces in the Chrome trace event format,
+which chrome://tracing and https://ui.perfetto.dev can open.
+
+This module only uses the standard library, so it can be imported by both app.py and the server.
+
+Usage:
+    # app.py
+    tracer = Tracer()
+    trace = tracer.begin(input_time)
+    with trace.stage("update_game"):
+        game.update_game(board, btn1, btn2)
+    utils.send_json(trace.attach(game.get_json()))
+
+    # server.py
+    trace_id = frame_trace_id(data)
+    ...
+    traces.add(from_ack(json.loads(message), client_id, delivery, monotonic()))
+    traces.export("trace.json")
+"""
+import json
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from itertools import count
+from time import monotonic
+
+# Start of the trace attached to a frame. The trace is always the last field, so it can be found from the end
+TRACE_MARKER = b',"trace":{"id":'
+
+# Processes that stages run in, in the order shown by trace viewers
+PROCESSES = ("app", "server", "browser")
+
+# Stages spent waiting rather than working. Waits for one frame can overlap those of the next, so trace
+# viewers show them on their own tracks
+WAIT_STAGES = {"poll", "post", "queue", "network", "ack"}
+
+# Separators for json.dumps that leave out all optional whitespace, as in utils.JSON_SEPARATORS
+_SEPARATORS = (',', ':')
+
+# A timed stage of a trace: (name, process, start, end)
+Span = tuple[str, str, float, float]
+
+class Trace:
+    """
+    The stages of handling one input in the app, which are sent to the server with its frame.
+    """
+    __slots__ = ("id", "stages")
+
+    def __init__(self, trace_id: int) -> None:
+        self.id = trace_id
+        # (name, start, end)
+        self.stages: list[tuple[str, float, float]] = []
+
+    def add(self, name: str, start: float, end: float) -> None:
+        """
+        Records that stage name ran from start to end.
+        """
+        self.stages.append((name, start, end))
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Times the code run in the with block as stage name.
+        """
+        start = monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, start, monotonic())
+
+    def attach(self, data: str) -> str:
+        """
+        Returns the JSON object data with the trace added as its last field, timestamped as sent now.
+        """
+        trace = json.dumps({"id": self.id, "stages": self.stages, "sent": monotonic()}, separators=_SEPARATORS)
+        return f'{data[:-1]},"trace":{trace}}}'
+
+class _DisabledTrace(Trace):
+    """
+    Trace used while tracing is disabled, which records nothing and leaves frames unchanged.
+    """
+    __slots__ = ()
+
+    def add(self, name: str, start: float, end: float) -> None:
+        pass
+
+    def stage(self, name: str):
+        return nullcontext()
+
+    def attach(self, data: str) -> str:
+        return data
+
+DISABLED = _DisabledTrace(0)
+
+class Tracer:
+    """
+    Starts a trace for each input handled by the app, or does nothing if not enabled.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._ids = count(1)
+
+    def begin(self, input_time: float = None, scan: tuple[float, float] = None) -> Trace:
+        """
+        Returns a new trace for an input received at input_time, which was read by the sensor scan
+        running from scan[0] to scan[1] if the board changed. Time until now is recorded as polling.
+        """
+        if not self.enabled:
+            return DISABLED
+        trace = Trace(next(self._ids))
+        if scan is not None:
+            trace.add("scan", *scan)
+            input_time = scan[1]
+        if input_time is not None:
+            trace.add("poll", input_time, monotonic())
+        return trace
+
+def frame_trace_id(data: bytes) -> int | None:
+    """
+    Returns the id of the trace attached to the frame data, or None if it isn't traced.
+    """
+    i = data.rfind(TRACE_MARKER)
+    if i < 0:
+        return None
+    start = i + len(TRACE_MARKER)
+    end = data.find(b",", start)
+    try:
+        return int(data[start:end])
+    except ValueError:
+        return None
+
+class CompletedTrace:
+    """
+    Every stage of one frame's journey from the app to one client's display.
+    """
+    __slots__ = ("id", "client", "spans")
+
+    def __init__(self, trace_id: int, client: int, spans: list[Span]) -> None:
+        self.id = trace_id
+        self.client = client
+        self.spans = spans
+
+    def duration(self) -> float:
+        """
+        Returns the time from the input being received to the frame being rendered.
+        """
+        rendered = max(end for name, process, start, end in self.spans if name == "render")
+        return rendered - self.spans[0][2]
+
+def from_ack(ack: dict, client: int, delivery: tuple[float, float, float], acked: float) -> CompletedTrace:
+    """
+    Returns the completed trace of a frame acknowledged by client at time acked.
+    ack is the message sent by the display: {"ack": the frame's trace, "parse": seconds, "render": seconds}.
+    delivery is when the server received the frame, started sending it to the client, and finished.
+    Raises KeyError, TypeError or ValueError if ack is malformed.
+    """
+    trace = ack["ack"]
+    received, send_start, send_end = delivery
+    parse, render = float(ack["parse"]), float(ack["render"])
+    spans = [(str(name), "app", float(start), float(end)) for name, start, end in trace["stages"]]
+    spans.append(("post", "app", float(trace["sent"]), received))
+    spans.append(("queue", "server", received, send_start))
+    spans.append(("send", "server", send_start, send_end))
+    # Assume the frame took as long to reach the display as the acknowledgement took to return
+    network = max(0.0, acked - send_end - parse - render) / 2
+    parsed = send_end + network + parse
+    spans.append(("network", "server", send_end, send_end + network))
+    spans.append(("parse", "browser", send_end + network, parsed))
+    spans.append(("render", "browser", parsed, parsed + render))
+    spans.append(("ack", "browser", parsed + render, acked))
+    return CompletedTrace(int(trace["id"]), client, spans)
+
+def _percentile(values: list[float], q: float) -> float:
+    """
+    Returns the q'th quantile of sorted values.
+    """
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+class TraceLog:
+    """
+    The last maxlen completed traces, with a summary of each stage's latency.
+    """
+
+    def __init__(self, maxlen: int = 1000) -> None:
+        self.traces: deque[CompletedTrace] = deque(maxlen=maxlen)
+
+    def add(self, trace: CompletedTrace) -> None:
+        self.traces.append(trace)
+
+    def summary(self) -> dict:
+        """
+        Returns the count, mean, median, 95th percentile and maximum latency in seconds of each stage,
+        and of the whole journey as "total", over the traces kept. Each client's display counts separately.
+        """
+        durations: dict[str, list[float]] = {}
+        for trace in self.traces:
+            for name, process, start, end in trace.spans:
+                durations.setdefault(name, []).append(end - start)
+            durations.setdefault("total", []).append(trace.duration())
+        summary = {}
+        for name, values in durations.items():
+            values.sort()
+            summary[name] = {
+                "count": len(values),
+                "mean": sum(values) / len(values),
+                "p50": _percentile(values, 0.5),
+                "p95": _percentile(values, 0.95),
+                "max": values[-1]
+            }
+        return summary
+
+    def chrome_trace(self) -> dict:
+        """
+        Returns the traces kept in the Chrome trace event format.
+        Each process is shown separately, with the server and browser stages of each client on their own thread.
+        The app's stages are shown once per trace, however many clients acknowledged it.
+        """
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": name}}
+                  for pid, name in enumerate(PROCESSES, 1)]
+        pids = {name: pid for pid, name in enumerate(PROCESSES, 1)}
+        clients, app_traces = set(), set()
+        for trace in self.traces:
+            if trace.client not in clients:
+                clients.add(trace.client)
+                for pid in (pids["server"], pids["browser"]):
+                    events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": trace.client + 1,
+                                   "args": {"name": f"client {trace.client}"}})
+            args = {"trace": trace.id, "client": trace.client}
+            for name, process, start, end in trace.spans:
+                if process == "app":
+                    if trace.id in app_traces:
+                        continue
+                    tid = 0
+                else:
+                    tid = trace.client + 1
+                event = {"name": name, "cat": process, "pid": pids[process], "tid": tid, "args": args}
+                if name in WAIT_STAGES:
+                    async_id = f"{trace.id}.{trace.client}"
+                    events.append({**event, "ph": "b", "id": async_id, "ts": start * 1e6})
+                    events.append({**event, "ph": "e", "id": async_id, "ts": end * 1e6})
+                else:
+                    events.append({**event, "ph": "X", "ts": start * 1e6, "dur": (end - start) * 1e6})
+            app_traces.add(trace.id)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path: str) -> None:
+        """
+        Writes the traces kept to path in the Chrome trace event format.
+        """
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f, separators=_SEPARATORS)
@@ -1,15 +1,118 @@
+import threading
 import requests
+from itertools import count
+from time import time, monotonic
 
 url = 'http://127.0.0.1:8000'
+
+# Separators for json.dumps that leave out all optional whitespace, keeping frames small
+JSON_SEPARATORS = (',', ':')
+
+class FrameSender:
+        """
+        Sends frames to the WebSocket server at base_url, or url if None, and tracks that server's backpressure.
+        Each sender has its own connection, so tables sending to different servers from different threads
+        neither share a session nor throttle each other. Calling a sender sends one frame, as send_json does.
+        """
+
+        def __init__(self, base_url: str = None) -> None:
+                self.base_url = base_url
+                # Reuse one connection to the server rather than opening a new one per frame
+                self.session = requests.Session()
+                # requests.Session isn't documented as thread-safe, so only one request is made at a time
+                self._lock = threading.Lock()
+                # Sequence numbers for frames sent with send_json_batch
+                self._frame_seq = count()
+                # Latest backpressure information returned by the server. See get_backpressure
+                self.backpressure = {"queueDepth": 0, "clients": 0, "frameInterval": 0.0}
+                self.last_frame_time: float = 0.0
+
+        def __call__(self, data: str) -> bool:
+                return self.send_json(data)
+
+        def _post(self, path: str, **kwargs) -> bool:
+                """
+                Sends a post request to the server and stores the backpressure information it returns.
+                Returns True if no exceptions were raised. False otherwise.
+                """
+                with self._lock:
+                        self.last_frame_time = monotonic()
+                        try:
+                                response = self.session.post((self.base_url or url) + path, timeout=3, **kwargs)
+                        except requests.exceptions.ConnectionError:
+                                print("Server could not be found")
+                                return False
+                        except requests.exceptions.ReadTimeout:
+                                print("Connection timed out")
+                                return False
+                try:
+                        data = response.json()
+                except ValueError:
+                        return True
+                if isinstance(data, dict):
+                        self.backpressure.update(data)
+                return True
+
+        def get_backpressure(self) -> dict:
+                """
+                Returns the backpressure information from the server's last response:
+                    queueDepth: frames waiting to be sent to the slowest client.
+                    clients: number of connected clients.
+                    frameInterval: suggested minimum seconds between frames so clients can keep up.
+                """
+                return dict(self.backpressure)
+
+        def frame_due(self, interval: float = 0.0) -> bool:
+                """
+                Returns True if a new frame should be sent, i.e. at least interval seconds, or the
+                server's suggested frame interval if longer, have passed since the last frame was sent.
+                Tick loops can use this to skip frames while the server is behind instead of stalling.
+                """
+                return monotonic() - self.last_frame_time >= max(interval, self.backpressure["frameInterval"])
+
+        def send_json(self, data: str) -> bool:
+                """
+                Sends a post request to the WebSocket server.
+                Returns True if no exceptions were raised. False otherwise.
+                """
+                return self._post('/post/', data=data)
+
+        def send_json_batch(self, frames: list[str]) -> bool:
+                """
+                Sends several JSON frames to the WebSocket server in a single post request.
+                Frames are given sequence numbers and timestamps so the server broadcasts them in the given order.
+                Returns True if no exceptions were raised. False otherwise.
+                """
+                now = time()
+                batch = {"frames": [{"seq": next(self._frame_seq), "ts": now, "data": data} for data in frames]}
+                return self._post('/post/batch/', json=batch)
+
+# Sends frames to the server at url, for the app's single table
+sender = FrameSender()
+
+def get_backpressure() -> dict:
+        """
+        Returns the backpressure information from the last response of the server at url. See FrameSender.get_backpressure
+        """
+        return sender.get_backpressure()
+
+def frame_due(interval: float = 0.0) -> bool:
+        """
+        Returns True if a new frame should be sent to the server at url. See FrameSender.frame_due
+        """
+        return sender.frame_due(interval)
+
 def send_json(data: str) -> bool:
         """
-        Sends a post request to the WebSocket server. Returns True if no exceptions were raised. False otherwise.
+        Sends a post request to the WebSocket server at url.
+        Tables sending to their own server should use a FrameSender of their own, e.g. host.server_output.
+        Returns True if no exceptions were raised. False otherwise.
+        """
+        return sender.send_json(data)
+
+def send_json_batch(frames: list[str]) -> bool:
+        """
+        Sends several JSON frames to the WebSocket server at url in a single post request.
+        Returns True if no exceptions were raised. False otherwise.
         """
-        try:
-            requests.post(url + '/post/', data=data, timeout=3)
-            return True
-        except requests.exceptions.ConnectionError:
-            print("Server could not be found")
-        except requests.exceptions.ReadTimeout:
-            print("Connection timed out")
-        return False
\ No newline at end of file
+        return sender.send_json_batch(frames)
@@ -43,9 +43,10 @@ function GameContainer() {
     ) || {};
 
     // WebSocket URL connects to the game server
+    // In production the page is served by the game server, so the websocket is on the same origin
     // react-use-websocket used to simplify usage of WebSocket API
-    const WS_URL = "ws://127.0.0.1:8000/ws";   
-    const { lastMessage, readyState } = useWebSocket(
+    const WS_URL = import.meta.env.DEV ? "ws://127.0.0.1:8000/ws" : `ws://${window.location.host}/ws`;
+    const { lastMessage, readyState, sendMessage } = useWebSocket(
         WS_URL,
         {
         share: true,
@@ -81,6 +82,19 @@ function GameContainer() {
                     // Update game phase
                     setGamePhase(parsedMsg.gamePhase || 'drawcard');
 
+                    // Acknowledge traced frames after the next paint, with how long they took to parse
+                    // and render in seconds, so the server can measure end-to-end latency
+                    if (parsedMsg.trace) {
+                        const parsed = performance.now();
+                        requestAnimationFrame(() => setTimeout(() => {
+                            sendMessage(JSON.stringify({
+                                ack: parsedMsg.trace,
+                                parse: (parsed - lastMessage.timeStamp) / 1000,
+                                render: (performance.now() - parsed) / 1000
+                            }));
+                        }, 0));
+                    }
+
                 } catch (error) {
                     console.log(`entities: ${JSON.stringify(parsedMsg.entities, null, 4)}`);
                 }
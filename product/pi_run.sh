@@ -5,12 +5,10 @@ cd "$parent_path"
 trap 'kill -SIGINT 0' EXIT INT SIGTERM SIGINT 
 # Start VE
 source pi_venv/bin/activate
-# Run server on 127.0.0.1:8000
-pushd backend && uvicorn server:app --host 127.0.0.1 --port 8000 2> /dev/null && popd &
-# Run frontend display w/o opening web browser
-sleep 1 && npm run pi --prefix frontend/interactive-system &
+# Run server on 127.0.0.1:8000, also serving the frontend display built by pi_setup.sh
+pushd backend && FRONTEND_DIST=../frontend/interactive-system/dist uvicorn server:app --host 127.0.0.1 --port 8000 2> /dev/null && popd &
 # Run web browser in kiosk mode (fullscreen)
-sleep 2 && chromium --app=http://localhost:5173 --kiosk &> /dev/null &
+sleep 2 && chromium --app=http://localhost:8000 --kiosk &> /dev/null &
 # Run application in VE
 sleep 2 && sudo pi_venv/bin/python3 app.py
 # Once application finishes, exit VE
@@ -5,7 +5,7 @@ cd "$parent_path"
 # Setup Virtual environment
 python3 -m venv pi_venv
 # Install needed modules in VE
-pi_venv/bin/pip3 install fastapi[standard] requests pynput rpi-gpio
+pi_venv/bin/pip3 install fastapi[standard] requests pynput rpi-gpio brotli
 # Install node if needed
 sudo apt install npm -y
 # Install node_modules for frontend
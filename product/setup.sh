@@ -3,6 +3,6 @@ parent_path=$( cd "$(dirname "${BASH_SOURCE[0]}")" ; pwd -P )
 cd "$parent_path"
 
 # Install needed modules
-pip install fastapi[standard] requests pynput &&
+pip install fastapi[standard] requests pynput numpy scipy &&
 # Install node_modules for frontend
 cd frontend/interactive-system && npm install && npm run build
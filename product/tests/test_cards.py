@@ -0,0 +1,31 @@
+import random
+
+import pytest
+
+from backend.game import SnakesAndLadders, Player
+from backend.game_components import CARD_TABLE, RollDiceCard
+
+def new_game() -> SnakesAndLadders:
+    game = SnakesAndLadders(10, 10, [Player("red", 0)], None, lambda: (False, False), True, seed=1)
+    game.snakes, game.ladders = [], []
+    game.send = lambda data: True
+    return game
+
+def test_roll_dice_card_rolls_its_own_dice():
+    game = new_game()
+    player = game.players[0]
+    player.position = game.geometry.position(10)
+
+    card = RollDiceCard()
+    roll = card.card_id - CARD_TABLE.by_type[RollDiceCard].card_id
+    assert 1 <= roll <= 6
+    card.apply(game, player)
+    assert game.geometry.tile(player.position) == 10 + roll
+
+def test_roll_dice_card_rolls_with_rng():
+    rolls = [RollDiceCard(rng=random.Random(7)).card_id for _ in range(2)]
+    assert rolls[0] == rolls[1]
+
+def test_roll_dice_card_rejects_invalid_roll():
+    with pytest.raises(ValueError):
+        RollDiceCard(7)
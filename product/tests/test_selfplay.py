@@ -0,0 +1,13 @@
+from backend import utils
+from backend.selfplay import self_play
+
+def test_self_play_sends_no_frames_to_the_server(monkeypatch):
+    requests = []
+    monkeypatch.setattr(utils.FrameSender, "_post", lambda sender, path, **kwargs: requests.append(path) or True)
+
+    result = self_play(20, n_players=4, seed=1)
+
+    assert result.games + len(result.stuck) + len(result.errors) == 20
+    assert not result.errors
+    assert result.frames_discarded > 0
+    assert requests == []
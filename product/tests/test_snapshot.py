@@ -0,0 +1,30 @@
+import pytest
+
+from backend import game as game_module
+from backend.game import SnakesAndLadders, Player
+
+def new_game(seed: int) -> SnakesAndLadders:
+    game = SnakesAndLadders(10, 10, [Player("red", 0), Player("blue", 0)], None, lambda: (False, False), True, seed=seed)
+    game.send = lambda data: True
+    return game
+
+def test_snapshot_round_trips_many_intermediate_positions():
+    game = new_game(1)
+    game.players[0].intermediate_positions = [(i % 10, i % 10) for i in range(300)]
+    restored = new_game(2)
+    restored.restore(game.snapshot())
+    assert restored.snapshot() == game.snapshot()
+
+def test_bad_trigger_index_raises_value_error_and_leaves_game_unchanged():
+    game = new_game(1)
+    game.minigame_trigger = game.snakes[0]
+    data = bytearray(game.snapshot())
+    # The trigger index follows the trigger kind in the header, see _SNAPSHOT_HEADER
+    trigger_index_offset = game_module._SNAPSHOT_HEADER.size - 4
+    data[trigger_index_offset] = 200
+
+    target = new_game(2)
+    before = target.snapshot()
+    with pytest.raises(ValueError):
+        target.restore(bytes(data))
+    assert target.snapshot() == before